@@ -1,55 +1,210 @@
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import streamlit as st
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # CONFIGURATION
 API_URL = "https://poutingly-grilled-kirk.ngrok-free.dev/recommend"
+# NDJSON variant: retrieval results first, the LLM's selection second
+STREAM_URL = API_URL + "/stream"
+# (connect, read) seconds per API call
+REQUEST_TIMEOUT = (5, 120)
+# Bulk mode: API calls in flight at once (also the connection pool size) and rows accepted per file
+BULK_CONCURRENCY = 8
+MAX_BULK_ROWS = 500
+# Repeated queries are answered from Streamlit's cache for this long
+CACHE_TTL_SECONDS = 3600
+# Columns tried, in order, for the job description and its label in an uploaded file
+QUERY_COLUMNS = ("Query", "query", "Job Description", "job_description", "JD", "Description", "text")
+LABEL_COLUMNS = ("Label", "label", "Role", "Title", "ID", "id")
 
 st.set_page_config(page_title="SHL Assessment Recommender", layout="wide")
 
 st.title("🤖 SHL Intelligent Assessment Recommender")
 st.markdown("Enter a job description or skill requirement below to get AI-powered recommendations.")
 
-# Input
-query = st.text_area("Job Description / Query", height=100, placeholder="Example: Looking for a Java Developer who is also good at team collaboration...")
 
-if st.button("Get Recommendations"):
-    if not query.strip():
-        st.warning("Please enter a query first.")
+@st.cache_resource
+def get_session():
+    """One pooled session per server process: connections are reused across clicks, users and bulk threads"""
+    session = requests.Session()
+    # Retries cover the API restarting or warming up (connect errors, 502/503/504), not slow answers:
+    # read=0 so a timed-out POST is never sent (and run through the LLM) again
+    retry = Retry(total=2, read=0, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=None)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=BULK_CONCURRENCY, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=4096, show_spinner=False)
+def recommend(query):
+    """Assessments for one query (errors raise and are not cached, so they are retried next time)"""
+    response = get_session().post(API_URL, json={"query": query}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["recommended_assessments"]
+
+
+def load_jobs(uploaded):
+    """[(label, query)] from an uploaded CSV/Excel file; the label is the query itself without a label column"""
+    if uploaded.name.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(uploaded)
     else:
-        with st.spinner("Analyzing requirements and searching catalog..."):
+        df = pd.read_csv(uploaded)
+    query_column = next((c for c in QUERY_COLUMNS if c in df.columns), None)
+    if query_column is None:
+        if len(df.columns) != 1:
+            raise ValueError(f"No job description column found. Name it one of: {', '.join(QUERY_COLUMNS)}")
+        query_column = df.columns[0]
+    label_column = next((c for c in LABEL_COLUMNS if c in df.columns), None)
+
+    jobs = []
+    for _, row in df.iterrows():
+        query = row[query_column]
+        if pd.isna(query) or not str(query).strip():
+            continue
+        label = row[label_column] if label_column and not pd.isna(row[label_column]) else query
+        jobs.append((str(label).strip(), str(query).strip()))
+    if len(jobs) > MAX_BULK_ROWS:
+        raise ValueError(f"{len(jobs)} rows found. At most {MAX_BULK_ROWS} per file.")
+    return jobs
+
+
+def run_bulk(jobs, progress, table):
+    """
+    Sends every distinct query over the pooled session, BULK_CONCURRENCY at a time,
+    updating the progress bar and per-job table as answers arrive.
+    Returns ({query: assessments}, {query: error message}).
+    """
+    queries = list(dict.fromkeys(query for _, query in jobs))
+    results, errors = {}, {}
+    status_rows = {query: {"Job": label[:80], "Assessments": None, "Status": "queued"} for label, query in jobs}
+
+    with ThreadPoolExecutor(max_workers=BULK_CONCURRENCY) as pool:
+        futures = {pool.submit(recommend, query): query for query in queries}
+        for done, future in enumerate(as_completed(futures), 1):
+            query = futures[future]
+            try:
+                results[query] = future.result()
+                status_rows[query].update({"Assessments": len(results[query]), "Status": "done"})
+            except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                errors[query] = str(e)
+                status_rows[query].update({"Status": f"error: {e}"[:120]})
+            progress.progress(done / len(queries), text=f"{done}/{len(queries)} job descriptions")
+            table.dataframe(pd.DataFrame(status_rows.values()), hide_index=True)
+    return results, errors
+
+
+def render_assessments(container, assessments, message):
+    """Replaces the container's contents with the table and detailed descriptions"""
+    with container.container():
+        if not assessments:
+            st.info("No assessments found.")
+            return
+        message(f"{len(assessments)} relevant assessments:")
+
+        # Display as a clean table
+        df = pd.DataFrame(assessments)
+        # Reorder columns for display
+        display_cols = ["name", "test_type", "duration", "adaptive_support", "url"]
+        st.dataframe(
+            df[display_cols],
+            column_config={
+                "url": st.column_config.LinkColumn("SHL Link"),
+                "test_type": "Category"
+            },
+            hide_index=True
+        )
+
+        # Detailed View
+        with st.expander("View Detailed Descriptions"):
+            for item in assessments:
+                st.markdown(f"### [{item['name']}]({item['url']})")
+                st.write(f"**Type:** {', '.join(item['test_type'])} | **Duration:** {item['duration']} mins")
+                st.write(item['description'])
+                st.divider()
+
+
+single_tab, bulk_tab = st.tabs(["Single query", "Bulk upload"])
+
+with single_tab:
+    # Input
+    query = st.text_area("Job Description / Query", height=100, placeholder="Example: Looking for a Java Developer who is also good at team collaboration...")
+
+    if st.button("Get Recommendations"):
+        if not query.strip():
+            st.warning("Please enter a query first.")
+        else:
+            status = st.empty()
+            results = st.empty()
+            status.caption("Searching catalog...")
             try:
-                response = requests.post(API_URL, json={"query": query})
-                if response.status_code == 200:
-                    data = response.json()
-                    assessments = data.get("recommended_assessments", [])
-                    
-                    if not assessments:
-                        st.info("No assessments found.")
+                # Each line is one event: the retrieval-ranked list arrives first, the AI selection replaces it
+                with get_session().post(STREAM_URL, json={"query": query}, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                    if response.status_code != 200:
+                        status.error(f"API Error: {response.status_code}")
                     else:
-                        st.success(f"Found {len(assessments)} relevant assessments:")
-                        
-                        # Display as a clean table
-                        df = pd.DataFrame(assessments)
-                        # Reorder columns for display
-                        display_cols = ["name", "test_type", "duration", "adaptive_support", "url"]
-                        st.dataframe(
-                            df[display_cols],
-                            column_config={
-                                "url": st.column_config.LinkColumn("SHL Link"),
-                                "test_type": "Category"
-                            },
-                            hide_index=True
-                        )
-                        
-                        # Detailed View
-                        with st.expander("View Detailed Descriptions"):
-                            for item in assessments:
-                                st.markdown(f"### [{item['name']}]({item['url']})")
-                                st.write(f"**Type:** {', '.join(item['test_type'])} | **Duration:** {item['duration']} mins")
-                                st.write(item['description'])
-                                st.divider()
-                else:
-                    st.error(f"API Error: {response.status_code}")
+                        for line in response.iter_lines():
+                            if not line:
+                                continue
+                            event = json.loads(line)
+                            if event["event"] == "preliminary":
+                                status.caption(f"Closest catalog matches ({event['elapsed_ms']:.0f} ms). "
+                                               "AI is refining the selection...")
+                                render_assessments(results, event["recommended_assessments"], st.info)
+                            elif event["event"] == "final":
+                                if event.get("fallback"):
+                                    status.warning("AI selection unavailable. Showing a balanced selection from the search results.")
+                                else:
+                                    status.caption(f"AI selection ({event['elapsed_ms']:.0f} ms).")
+                                render_assessments(results, event["recommended_assessments"], st.success)
+                            else:
+                                status.error(f"API Error: {event.get('detail', 'unknown error')}")
             except requests.exceptions.ConnectionError:
-                st.error("Could not connect to API. Is 'python main.py' running?")
\ No newline at end of file
+                status.error("Could not connect to API. Is 'python main.py' running?")
+            except requests.exceptions.Timeout:
+                status.error("The API did not answer in time. Please try again.")
+
+with bulk_tab:
+    st.markdown("Upload a CSV or Excel file with one job description per row "
+                f"(column `Query` or `Job Description`, optional `Label`; up to {MAX_BULK_ROWS} rows).")
+    uploaded = st.file_uploader("Job descriptions", type=["csv", "xlsx", "xls"])
+
+    if uploaded is not None:
+        try:
+            jobs = load_jobs(uploaded)
+        except (ValueError, ImportError) as e:  # ImportError: Excel support needs openpyxl
+            st.error(f"Could not read '{uploaded.name}': {e}")
+            jobs = []
+
+        if jobs:
+            st.caption(f"{len(jobs)} job descriptions ({len({q for _, q in jobs})} distinct).")
+            if st.button("Get Recommendations for All"):
+                progress = st.progress(0.0, text="Starting...")
+                table = st.empty()
+                results, errors = run_bulk(jobs, progress, table)
+                # Kept across reruns, so clicking the download button does not lose the results
+                st.session_state["bulk"] = {"file": uploaded.name, "jobs": jobs, "results": results, "errors": errors}
+
+    bulk = st.session_state.get("bulk")
+    if bulk is not None and uploaded is not None and bulk["file"] == uploaded.name:
+        # Same shape as the submission CSV: one Query/Assessment_url row per recommendation, input order
+        rows = [
+            {"Query": label, "Assessment_url": item["url"]}
+            for label, query in bulk["jobs"] if query in bulk["results"]
+            for item in bulk["results"][query]
+        ]
+        combined = pd.DataFrame(rows, columns=["Query", "Assessment_url"])
+        if bulk["errors"]:
+            st.warning(f"{len(bulk['errors'])} job descriptions failed. Run again to retry them "
+                       "(finished ones are answered from the cache).")
+        st.success(f"{len(combined)} recommendations for {len(bulk['results'])} job descriptions.")
+        st.dataframe(combined, column_config={"Assessment_url": st.column_config.LinkColumn("SHL Link")}, hide_index=True)
+        st.download_button(
+            "Download CSV", combined.to_csv(index=False).encode("utf-8"),
+            file_name="recommendations.csv", mime="text/csv"
+        )
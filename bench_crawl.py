@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import ingest_data
+
+# --- CONFIGURATION ---
+CATALOG_PATH = "/products/product-catalog/"
+TYPE_KEYS = ["K", "P", "A", "S", "C", "B"]
+
+
+def catalog_html(start, num_products):
+    rows = []
+    for i in range(start, min(start + ingest_data.PAGE_SIZE, num_products)):
+        keys = "".join(
+            f'<span class="product-catalogue__key">{k}</span>'
+            for k in TYPE_KEYS[i % len(TYPE_KEYS):][:1 + i % 2]
+        )
+        rows.append(
+            f'<tr data-entity-id="{1000 + i}">'
+            f'<td class="custom__table-heading__title"><a href="{CATALOG_PATH}view/test-{i}/">Fixture Test {i}</a></td>'
+            f'<td class="custom__table-heading__general"><span class="catalogue__circle -yes"></span></td>'
+            f'<td class="product-catalogue__keys custom__table-heading__general">{keys}</td>'
+            f'</tr>'
+        )
+    return (
+        "<html><head><title>Product Catalog</title></head><body>"
+        '<table><tr><th class="custom__table-heading__title">Individual Test Solutions</th></tr>'
+        + "".join(rows) + "</table></body></html>"
+    )
+
+
+def detail_html(i):
+    # Mix both duration phrasings seen on the real site (only the first matches the regex)
+    duration = (f"<p>Completion Time {10 + i % 40} minutes</p>" if i % 3
+                else f"<p>Approximate Completion Time in minutes = {10 + i % 40}</p>")
+    adaptive = "<p>This test is adaptive.</p>" if i % 7 == 0 else ""
+    return (
+        f'<html><head><title>Fixture Test {i}</title>'
+        f'<meta name="description" content="Fixture Test {i}: multi-choice test that measures skill number {i}.">'
+        f'<script>var tracking = "Time 99 minutes";</script></head><body>'
+        f'<nav><a href="/">Home</a> <a href="{CATALOG_PATH}">Catalog</a></nav>'
+        f'<div class="product-layout__content"><h1>Fixture Test {i}</h1>'
+        f'<h4>Description</h4><p>Longer description of fixture test {i}.</p>'
+        f'<h4>Assessment length</h4>{duration}{adaptive}</div>'
+        f'<footer>Copyright SHL</footer></body></html>'
+    )
+
+
+def start_fixture_server(num_products, latency):
+    """Serves a synthetic SHL catalog on localhost; returns (server, catalog URL)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            parts = urlsplit(self.path)
+            if parts.path == CATALOG_PATH:
+                start = int(parse_qs(parts.query).get("start", ["0"])[0])
+                body = catalog_html(start, num_products)
+            elif parts.path.startswith(CATALOG_PATH + "view/test-"):
+                body = detail_html(int(parts.path.rstrip("/").rsplit("-", 1)[1]))
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode("utf-8")
+            etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{CATALOG_PATH}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end crawl benchmark against a local fixture server")
+    parser.add_argument("--products", type=int, default=377)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency per request (s)")
+    parser.add_argument("--rate", type=float, default=50, help="Async crawler requests per second per host")
+    parser.add_argument("--compare", action="store_true", help="Also time the original sequential crawler")
+    parser.add_argument("--recrawl", action="store_true", help="Also time a cached, conditional re-crawl")
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(args.products, args.latency)
+    cache_dir = tempfile.TemporaryDirectory()
+    cache_file = os.path.join(cache_dir.name, "http_cache.sqlite3")
+
+    def async_crawl(cache=None):
+        return asyncio.run(ingest_data.crawl(base_url, rate=args.rate, burst=args.rate,
+                                             cache_file=cache, checkpoint_file=None))
+
+    try:
+        runs = [("async pipeline", async_crawl)]
+        if args.recrawl:
+            runs.append(("cold (cached)", lambda: async_crawl(cache_file)))
+            runs.append(("re-crawl", lambda: async_crawl(cache_file)))
+        if args.compare:
+            runs.append(("sequential", lambda: ingest_data.crawl_sequential(base_url)))
+
+        timings = []
+        for label, run in runs:
+            start = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - start
+            timings.append((label, elapsed, len(results)))
+
+        print(f"\n--- CRAWL BENCHMARK ({args.products} products, {args.latency * 1000:.0f} ms server latency) ---")
+        for label, elapsed, count in timings:
+            print(f"{label:<16} {elapsed:7.2f}s  {count} assessments  {count / elapsed:.1f} pages/s")
+    finally:
+        server.shutdown()
+        cache_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
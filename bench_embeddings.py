@@ -0,0 +1,131 @@
+import argparse
+import time
+
+import numpy as np
+
+from embedding_backends import BACKENDS, get_embeddings
+from vector_index import NumpyIndex
+from vector_store import build_document, load_assessments
+
+# --- CONFIGURATION ---
+SAMPLE_QUERIES = [
+    "Need a Java developer who is good in collaborating with external teams and stakeholders.",
+    "Looking to hire mid-level professionals who are proficient in Python, SQL and Java Script.",
+    "I am hiring for an analyst and want to screen using Cognitive and personality tests",
+    "I need a sales manager who can drive revenue and manage a large team.",
+    "We need a customer service representative who remains calm under pressure.",
+    "Content writer with strong English and SEO skills",
+    "Entry-level bank cashier, numerical accuracy is important",
+    "Senior data scientist: statistics, machine learning, Python",
+    ".NET MVC",
+    "OPQ",
+]
+
+
+def percentile_ms(samples, pct):
+    return float(np.percentile(samples, pct)) * 1000
+
+
+def embed_catalog(embeddings, documents):
+    start = time.perf_counter()
+    vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+    return np.asarray(vectors, dtype=np.float32), time.perf_counter() - start
+
+
+def top_urls(index, vectors, k):
+    rows, _ = index.search_many(vectors, k)
+    return [[index.metadatas[i]['url'] for i in query_rows] for query_rows in rows]
+
+
+def check_parity(models, documents, k):
+    """
+    Top-k over the catalog: each backend against its own index, and the ONNX
+    queries against the torch-built index (what a deployment sees before the
+    store is rebuilt with the new backend).
+    """
+    metadatas = [doc.metadata for doc in documents]
+    baseline, candidate = models["torch"], models["onnx"]
+
+    torch_docs, _ = embed_catalog(baseline, documents)
+    onnx_docs, _ = embed_catalog(candidate, documents)
+    torch_queries = np.asarray(baseline.embed_documents(SAMPLE_QUERIES), dtype=np.float32)
+    onnx_queries = np.asarray(candidate.embed_documents(SAMPLE_QUERIES), dtype=np.float32)
+
+    doc_cosines = np.sum(torch_docs * onnx_docs, axis=1) / (
+        np.linalg.norm(torch_docs, axis=1) * np.linalg.norm(onnx_docs, axis=1))
+    print(f"\n--- PARITY (top-{k}, {len(documents)} assessments) ---")
+    print(f"Document vector cosine torch vs onnx: mean {doc_cosines.mean():.4f}, min {doc_cosines.min():.4f}")
+
+    torch_index = NumpyIndex(torch_docs, metadatas)
+    expected = top_urls(torch_index, torch_queries, k)
+    scenarios = [
+        ("onnx index + onnx queries", top_urls(NumpyIndex(onnx_docs, metadatas), onnx_queries, k)),
+        ("torch index + onnx queries", top_urls(torch_index, onnx_queries, k)),
+    ]
+
+    all_identical = True
+    for label, got in scenarios:
+        identical = sum(1 for a, b in zip(expected, got) if a == b)
+        same_set = sum(1 for a, b in zip(expected, got) if set(a) == set(b))
+        overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(expected, got)])
+        all_identical &= identical == len(expected)
+        print(f"{label:<28} identical order {identical}/{len(expected)}, same set {same_set}/{len(expected)}, "
+              f"mean overlap {overlap:.1%}")
+        for query, a, b in zip(SAMPLE_QUERIES, expected, got):
+            if a != b:
+                print(f"    differs: {query[:50]!r} ({len(set(a) & set(b))}/{k} shared)")
+    return all_identical
+
+
+def benchmark(name, embeddings, documents, queries):
+    latencies = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        embeddings.embed_query(f"{query} #{i}")  # unique text, nothing is cached
+        latencies.append(time.perf_counter() - start)
+
+    _, batch_seconds = embed_catalog(embeddings, documents)
+    return {
+        "backend": name,
+        "p50": percentile_ms(latencies, 50),
+        "p95": percentile_ms(latencies, 95),
+        "qps": len(latencies) / sum(latencies),
+        "docs_per_s": len(documents) / batch_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity and speed of the torch vs ONNX int8 embedding backends")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=200, help="Single-query embeddings per backend")
+    parser.add_argument("--skip-parity", action="store_true")
+    args = parser.parse_args()
+
+    data = load_assessments()
+    if data is None:
+        return
+    documents = [build_document(item) for item in data]
+
+    models = {}
+    load_seconds = {}
+    for backend in BACKENDS:
+        start = time.perf_counter()
+        models[backend] = get_embeddings(backend)
+        load_seconds[backend] = time.perf_counter() - start
+
+    parity_ok = True if args.skip_parity else check_parity(models, documents, args.k)
+
+    queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(args.queries)]
+    rows = [benchmark(name, model, documents, queries) for name, model in models.items()]
+
+    print(f"\n--- EMBEDDING BENCHMARK ({args.queries} single queries, {len(documents)}-document batch) ---")
+    print(f"{'backend':<8} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'queries/s':>10} {'batch docs/s':>13}")
+    for row in rows:
+        print(f"{row['backend']:<8} {load_seconds[row['backend']]:>7.2f} {row['p50']:>8.2f} {row['p95']:>8.2f} "
+              f"{row['qps']:>10.1f} {row['docs_per_s']:>13.1f}")
+    if not parity_ok:
+        print("\nNote: top-k order differs for some queries (see PARITY above).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import os
+import time
+
+import extract
+
+# --- CONFIGURATION ---
+FIXTURE_DIR = "fixtures"
+# ingest_data.py as of the baseline commit, copied unchanged: its scrape functions are the benchmark baseline
+BASELINE_MODULE = os.path.join(FIXTURE_DIR, "baseline_ingest_data.py")
+STUB_ASSESSMENT = {
+    "name": "Fixture",
+    "url": "https://www.shl.com/products/product-catalog/view/fixture/",
+    "test_type": ["Knowledge & Skills"],
+    "remote_support": "Yes",
+    "adaptive_support": "No"
+}
+
+
+class FixtureResponse:
+    """What the baseline functions get back from the network: the saved page"""
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+class FixtureSession:
+    """Stands in for the session (scrape_catalog_page) and the requests module (scrape_details)"""
+
+    def __init__(self, html):
+        self.html = html
+
+    def get(self, url, **kwargs):
+        return FixtureResponse(self.html)
+
+
+def load_baseline():
+    spec = importlib.util.spec_from_file_location("baseline_ingest_data", BASELINE_MODULE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def baseline_details(baseline, html):
+    baseline.requests = FixtureSession(html)
+    return baseline.scrape_details(dict(STUB_ASSESSMENT))
+
+
+def normalized(records):
+    """The baseline builds test_type from a set, so its order varies between runs"""
+    if isinstance(records, dict):
+        return {**records, "test_type": sorted(records["test_type"])}
+    return [normalized(record) for record in records]
+
+
+def load_fixtures():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def run(func, pages, iterations):
+    """Returns (pages/sec, records of the last pass)"""
+    records = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        records = [func(html) for html in pages]
+    elapsed = time.perf_counter() - start
+    return len(pages) * iterations / elapsed, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction micro-benchmark over saved HTML fixtures")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    catalog_pages = [html for name, html in fixtures.items() if name.startswith("catalog")]
+    product_pages = [html for name, html in fixtures.items() if name.startswith("product")]
+    print(f"Fixtures: {len(catalog_pages)} catalog, {len(product_pages)} product pages (lxml available: {extract.HAVE_LXML})")
+
+    baseline = load_baseline()
+    cases = [
+        ("catalog", catalog_pages,
+         lambda html: baseline.scrape_catalog_page(0, FixtureSession(html)),
+         lambda html: extract.extract_catalog_rows_bs4(html),
+         lambda html: extract.extract_catalog_rows(html)),
+        ("product", product_pages,
+         lambda html: baseline_details(baseline, html),
+         lambda html: extract.extract_details_bs4(dict(STUB_ASSESSMENT), html),
+         lambda html: extract.extract_details(dict(STUB_ASSESSMENT), html)),
+    ]
+
+    print(f"\n--- EXTRACTION BENCHMARK ({args.iterations} passes) ---")
+    print(f"{'page type':<10} {'baseline':>12} {'bs4 fallback':>14} {'fast path':>12} {'speedup':>8}")
+    for label, pages, original, fallback, fast in cases:
+        # The baseline prints a line per product page
+        with contextlib.redirect_stdout(io.StringIO()):
+            base_rate, base_records = run(original, pages, args.iterations)
+        fallback_rate, fallback_records = run(fallback, pages, args.iterations)
+        fast_rate, fast_records = run(fast, pages, args.iterations)
+        expected = normalized(base_records)
+        assert normalized(fallback_records) == expected, f"{label}: bs4 fallback extracted different records"
+        assert normalized(fast_records) == expected, f"{label}: fast path extracted different records"
+        print(f"{label:<10} {base_rate:>8.1f} p/s {fallback_rate:>10.1f} p/s {fast_rate:>8.1f} p/s "
+              f"{fast_rate / base_rate:>7.1f}x")
+    print("\nExtracted records are identical to the baseline functions' for every fixture.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+# Response building only: no LLM calls, no cached answers between requests
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from fastapi.encoders import jsonable_encoder
+
+import catalog_records
+from rag_engine import RecommendationEngine
+from main import RecommendationResponse
+
+# --- CONFIGURATION ---
+CANDIDATES = 15
+SELECTED = 7
+SEED = 0
+
+
+def legacy_add_to_list(list_obj, meta):
+    """The per-request hydration this benchmark replaces (formerly RecommendationEngine._add_to_list)"""
+    list_obj.append({
+        "url": meta['url'],
+        "name": meta['name'],
+        "adaptive_support": meta['adaptive_support'],
+        "description": meta.get('description', 'No description')[:300],
+        "duration": int(meta['duration']),
+        "remote_support": meta['remote_support'],
+        "test_type": [meta['test_type']]
+    })
+
+
+def legacy_finalize(doc_map, selected):
+    final_recommendations = []
+    for meta in selected:
+        legacy_add_to_list(final_recommendations, meta)
+    if len(final_recommendations) < 5:
+        for i in range(len(doc_map)):
+            if len(final_recommendations) >= 5: break
+            current_names = [x['name'] for x in final_recommendations]
+            if doc_map[i]['name'] not in current_names:
+                legacy_add_to_list(final_recommendations, doc_map[i])
+    return {"recommended_assessments": final_recommendations[:10], "source": "llm"}
+
+
+def legacy_body(doc_map, selected):
+    """Hydration plus what FastAPI did with the returned dict: validate, encode, json.dumps"""
+    result = legacy_finalize(doc_map, selected)
+    validated = RecommendationResponse.model_validate(result)
+    content = jsonable_encoder(validated.model_dump(mode="json"))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fragment_body(engine, doc_map, selected):
+    result = engine._finalize(engine.state, "", None, doc_map, selected, "local")
+    return catalog_records.render(result["recommended_assessments"])
+
+
+def timed_us(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1e6
+
+
+def report(label, samples):
+    print(f"  {label:<34} p50 {np.percentile(samples, 50):8.1f} us   p95 {np.percentile(samples, 95):8.1f} us")
+
+
+async def http_latencies(requests_count):
+    """/recommend answered from the response cache, so the request cost is mostly building the body"""
+    import httpx
+    import main as api
+
+    query = "I need a sales manager who can drive revenue and manage a large team."
+    samples = []
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench")
+    async with api.app.router.lifespan_context(api.app), client:
+        await client.post("/recommend", json={"query": query, "selection": "local"})
+        for _ in range(requests_count):
+            start = time.perf_counter()
+            response = await client.post("/recommend", json={"query": query})
+            samples.append((time.perf_counter() - start) * 1e6)
+            assert response.status_code == 200
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request response-build cost: dict hydration + pydantic vs fragments")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--http", action="store_true",
+                        help="Also time /recommend end to end in-process (needs the embedding model)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    engine = RecommendationEngine()
+    print(f"Engine with {len(engine.catalog)} pre-hydrated records loaded in {time.perf_counter() - start:.2f}s.")
+
+    rng = random.Random(SEED)
+    metadatas = list(engine.index.metadatas) if engine.index is not None else None
+    if metadatas is None:
+        raise SystemExit("The benchmark reads the catalog from the NumPy index. Run vector_store.py first.")
+    workload = []
+    for _ in range(args.requests):
+        doc_map = dict(enumerate(rng.sample(metadatas, CANDIDATES)))
+        # Every tenth request takes the fill path (too few selections)
+        count = 3 if rng.random() < 0.1 else SELECTED
+        workload.append((doc_map, [doc_map[i] for i in rng.sample(range(CANDIDATES), count)]))
+
+    # Same bytes either way (once parsed); then time both
+    for doc_map, selected in workload[:50]:
+        assert json.loads(legacy_body(doc_map, selected)) == json.loads(fragment_body(engine, doc_map, selected))
+
+    before = [timed_us(legacy_body, doc_map, selected)[1] for doc_map, selected in workload]
+    after = [timed_us(fragment_body, engine, doc_map, selected)[1] for doc_map, selected in workload]
+
+    print(f"\n--- RESPONSE BUILD PER REQUEST ({args.requests} requests, {SELECTED} selected of {CANDIDATES}) ---")
+    report("before: dicts + pydantic + json", before)
+    report("after: records + fragment join", after)
+    print(f"\nMedian speedup: {np.median(before) / np.median(after):.1f}x")
+
+    if args.http:
+        print("\n/recommend from the response cache (in-process ASGI):")
+        report("request", asyncio.run(http_latencies(min(args.requests, 500))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import os
+
+# Every query must pay for its own embedding and LLM call; the LLM is the local fake
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY", "0.5")
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+os.environ.setdefault("EMBEDDING_CACHE_SIZE", "0")
+
+from rag_engine import RecommendationEngine
+from stage_timing import latency_summary, summary_line, timed
+
+# --- CONFIGURATION ---
+PRODUCT_QUERIES = ["Java 8", ".NET MVC", "OPQ", "SQL Server", "SQL", "MS Excel"]
+OPEN_QUERIES = [
+    "I am hiring for Java developers who can also collaborate effectively with my business teams.",
+    "Looking to hire mid-level professionals who are proficient in Python, SQL and Java Script.",
+    "I am hiring for an analyst and want to screen applications using Cognitive and personality tests",
+    "I need a sales manager who can drive revenue and manage a large team.",
+    "We need a customer service representative who remains calm under pressure.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency of the lexical shortcut vs the hybrid LLM path")
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the stage-level query set")
+    args = parser.parse_args()
+
+    engine = RecommendationEngine()
+    if engine.lexical is None:
+        raise SystemExit("No lexical index found. Run vector_store.py first.")
+    # Model, LLM client and lazy imports load here, not inside the first timed call
+    engine.warm_up()
+    if engine.warm_up_error:
+        raise SystemExit(f"Warm-up failed: {engine.warm_up_error}")
+
+    # 1. Shortcut path: product-name queries answered from BM25 alone
+    shortcut = []
+    for _ in range(args.rounds):
+        for query in PRODUCT_QUERIES:
+            result, seconds = timed(engine.search_and_recommend, query)
+            assert result["source"] == "lexical", f"{query!r} did not take the shortcut"
+            shortcut.append(seconds)
+
+    # 2. Hybrid path, stage by stage
+    stages = {"embedding": [], "vector search (k=15)": [], "bm25 search (k=15)": [], "rrf fusion": []}
+    for _ in range(args.rounds):
+        for query in OPEN_QUERIES:
+            vector, seconds = timed(engine.embeddings.inner.embed_query, query)
+            stages["embedding"].append(seconds)
+            docs, seconds = timed(engine.index.similarity_search_by_vector, vector, 15)
+            stages["vector search (k=15)"].append(seconds)
+            _, seconds = timed(engine.lexical.search, query, 15)
+            stages["bm25 search (k=15)"].append(seconds)
+            _, seconds = timed(engine._fuse, engine.state, query, docs, 15)
+            stages["rrf fusion"].append(seconds)
+
+    # 3. Hybrid path end to end (includes the LLM call)
+    hybrid = []
+    for i, query in enumerate(OPEN_QUERIES * 2):
+        result, seconds = timed(engine.search_and_recommend, f"{query} (run {i})")
+        assert result["source"] != "lexical"
+        hybrid.append(seconds)
+
+    print(f"\n--- LEXICAL vs HYBRID PATH ({len(engine.lexical)} assessments, "
+          f"fake LLM latency {os.environ['FAKE_LLM_LATENCY']}s) ---")
+    print("Shortcut path (product names, no embedding / LLM):")
+    print(summary_line("end to end", shortcut))
+    print("Hybrid path stages:")
+    for label, samples in stages.items():
+        print(summary_line(label, samples))
+    print("Hybrid path:")
+    print(summary_line("end to end (with LLM)", hybrid))
+    speedup = latency_summary(hybrid)["p50_ms"] / latency_summary(shortcut)["p50_ms"]
+    print(f"\nShortcut is {speedup:,.0f}x faster at the median.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+
+import numpy as np
+
+# Every query must pay for its own selection; the LLM is the local fake
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY", "0.5")
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+
+import reranker
+from rag_engine import RecommendationEngine, MAX_CANDIDATES
+from stage_timing import summary_line, timed
+
+# --- CONFIGURATION ---
+QUERIES = [
+    "I am hiring for Java developers who can also collaborate effectively with my business teams.",
+    "Looking to hire mid-level professionals who are proficient in Python, SQL and Java Script.",
+    "I am hiring for an analyst and want to screen applications using Cognitive and personality tests",
+    "I need a sales manager who can drive revenue and manage a large team.",
+    "We need a customer service representative who remains calm under pressure.",
+]
+
+
+def balance_coverage(recommendations):
+    """How many of reranker.BALANCE_TYPES the result list contains"""
+    types = {t for rec in recommendations for t in reranker.split_types(rec["test_type"][0])}
+    return sum(t in types for t in reranker.BALANCE_TYPES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and type balance of local selection vs the LLM path")
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the query set")
+    args = parser.parse_args()
+
+    engine = RecommendationEngine()
+    # Model, LLM client and lazy imports load here, not inside the first timed call
+    engine.warm_up()
+    if engine.warm_up_error:
+        raise SystemExit(f"Warm-up failed: {engine.warm_up_error}")
+    prepared = []
+    for query in QUERIES:
+        vector = engine.embeddings.embed_query(query)
+        prepared.append((query, vector, engine._retrieve(engine.state, query, vector, k=MAX_CANDIDATES)))
+
+    # 1. Selection alone and the whole local completion (selection + hydration)
+    select, complete = [], []
+    for _ in range(args.rounds):
+        for query, vector, docs in prepared:
+            doc_map = {i: doc.metadata for i, (_, doc) in enumerate(engine._unique_candidates(docs))}
+            _, seconds = timed(engine._rerank, engine.state, vector, doc_map)
+            select.append(seconds)
+            _, seconds = timed(engine._complete_locally, engine.state, query, vector, docs)
+            complete.append(seconds)
+
+    # 2. End to end per mode, plus the old fallback (raw top 5) for comparison
+    end_to_end = {"local": [], "llm": []}
+    coverage = {"local": [], "llm": [], "raw top 5": []}
+    for i, (query, vector, docs) in enumerate(prepared * 2):
+        for mode in end_to_end:
+            result, seconds = timed(engine.search_and_recommend, f"{query} (run {i})", selection=mode)
+            end_to_end[mode].append(seconds)
+            coverage[mode].append(balance_coverage(result["recommended_assessments"]))
+        top5 = [{"test_type": [doc.metadata["test_type"]]} for _, doc in engine._unique_candidates(docs)[:5]]
+        coverage["raw top 5"].append(balance_coverage(top5))
+
+    print(f"\n--- LOCAL vs LLM SELECTION (fake LLM latency {os.environ['FAKE_LLM_LATENCY']}s) ---")
+    print("Local selection:")
+    print(summary_line("reranker (MMR + quotas)", select))
+    print(summary_line("selection + hydration", complete))
+    print("End to end:")
+    for mode, samples in end_to_end.items():
+        print(summary_line(f"selection={mode}", samples))
+    print(f"\nBalance types covered (of {len(reranker.BALANCE_TYPES)}), mean per query:")
+    for label, values in coverage.items():
+        print(f"  {label:<26} {np.mean(values):.2f}")
+
+
+if __name__ == "__main__":
+    main()
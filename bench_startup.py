@@ -0,0 +1,91 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+# --- CONFIGURATION ---
+POLL_INTERVAL = 0.05
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_server_start(timeout, env):
+    """Spawns `uvicorn main:app`; returns seconds until /health and /ready first answer 200"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    timings = {"health": None, "ready": None}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - start < timeout and timings["ready"] is None:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {process.returncode}")
+                for probe in ("health", "ready"):
+                    if timings[probe] is not None:
+                        continue
+                    try:
+                        if client.get(f"/{probe}").status_code == 200:
+                            timings[probe] = time.perf_counter() - start
+                    except httpx.HTTPError:
+                        pass
+                time.sleep(POLL_INTERVAL)
+    finally:
+        process.terminate()
+        process.wait()
+    return timings
+
+
+def time_index_load():
+    """In-process: mapping the snapshot vs opening Chroma and reading every vector"""
+    from vector_index import NumpyIndex
+
+    start = time.perf_counter()
+    snapshot = NumpyIndex.from_snapshot()
+    snapshot_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    from langchain_chroma import Chroma
+    chroma = NumpyIndex.from_chroma(Chroma(persist_directory="chroma_db"))
+    chroma_seconds = time.perf_counter() - start
+    return snapshot, snapshot_seconds, chroma, chroma_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark: time to /health, time to /ready")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=180, help="Give up on /ready after this many seconds")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("LLM_BACKEND", "fake")
+
+    snapshot, snapshot_seconds, chroma, chroma_seconds = time_index_load()
+    print("\n--- INDEX LOAD ---")
+    if snapshot is None:
+        print("snapshot              missing (run vector_store.py)")
+    else:
+        print(f"snapshot (mmap)        {snapshot_seconds * 1000:8.1f} ms  ({len(snapshot)} rows)")
+    print(f"chroma (import+read)  {chroma_seconds * 1000:8.1f} ms  ({len(chroma)} rows)")
+
+    print(f"\n--- SERVER START ({args.runs} runs, LLM_BACKEND={env['LLM_BACKEND']}) ---")
+    print(f"{'run':<4} {'/health':>9} {'/ready':>9}")
+    for run in range(1, args.runs + 1):
+        timings = time_server_start(args.timeout, env)
+        health = f"{timings['health']:.2f}s" if timings["health"] is not None else "timeout"
+        ready = f"{timings['ready']:.2f}s" if timings["ready"] is not None else "timeout"
+        print(f"{run:<4} {health:>9} {ready:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import json
+from collections.abc import Mapping
+
+# --- CONFIGURATION ---
+# Descriptions are cut to this many characters in API responses
+DESCRIPTION_CHARS = 300
+
+
+class AssessmentRecord(Mapping):
+    """
+    One assessment exactly as the API returns it: a read-only mapping
+    (record["url"], dict(record)) plus `fragment`, its JSON encoding,
+    built once so a response body is a join of bytes.
+    """
+    __slots__ = ("_item", "fragment")
+
+    def __init__(self, meta):
+        item = {
+            "url": meta['url'],
+            "name": meta['name'],
+            "adaptive_support": meta['adaptive_support'],
+            "description": meta.get('description', 'No description')[:DESCRIPTION_CHARS],
+            "duration": int(meta['duration']),
+            "remote_support": meta['remote_support'],
+            "test_type": (meta['test_type'],)
+        }
+        self._item = item
+        self.fragment = json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def __getitem__(self, key):
+        return self._item[key]
+
+    def __iter__(self):
+        return iter(self._item)
+
+    def __len__(self):
+        return len(self._item)
+
+    def __repr__(self):
+        return f"AssessmentRecord({self._item['name']!r})"
+
+
+class AssessmentCatalog:
+    """URL -> AssessmentRecord for every loaded assessment, built once per index version"""
+
+    def __init__(self, metadatas=()):
+        self._records = {meta['url']: AssessmentRecord(meta) for meta in metadatas}
+
+    def __len__(self):
+        return len(self._records)
+
+    def record(self, meta):
+        """The prebuilt record for meta's URL (built and kept on first use if the catalog lacks it)"""
+        record = self._records.get(meta['url'])
+        if record is None:
+            record = self._records[meta['url']] = AssessmentRecord(meta)
+        return record
+
+
+def render(records, **fields):
+    """
+    JSON object bytes: `fields` (JSON-encoded) followed by "recommended_assessments"
+    joined from the records' fragments. render(records) is the /recommend body.
+    """
+    head = json.dumps(fields, ensure_ascii=False, separators=(",", ":"))[1:-1].encode("utf-8")
+    return b"".join((
+        b"{", head, b"," if head else b"",
+        b'"recommended_assessments":[', b",".join(record.fragment for record in records), b"]}"
+    ))
+
+
+def render_batch(items):
+    """/recommend/batch body from RecommendationEngine._batch_item dicts"""
+    return b'{"results":[' + b",".join(
+        render(item["recommended_assessments"], query=item["query"], source=item["source"], error=item["error"])
+        for item in items
+    ) + b"]}"
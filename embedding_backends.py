@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# --- CONFIGURATION ---
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# "torch" = sentence-transformers on PyTorch (fp32), "onnx" = int8 ONNX Runtime export (see export_onnx.py).
+# Read by both vector_store.py and rag_engine.py so the index and the queries use the same model.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", os.path.join("models", "all-MiniLM-L6-v2-onnx-int8"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = let ONNX Runtime decide
+ONNX_BATCH_SIZE = 32
+
+BACKENDS = ("torch", "onnx")
+
+
+def get_embeddings(backend=EMBEDDING_BACKEND):
+    """The embedding model for the configured backend"""
+    if backend == "torch":
+        # Imported here so ONNX deployments never load PyTorch
+        from langchain_huggingface import HuggingFaceEmbeddings
+        print(f"Initializing AI Model ({EMBEDDING_MODEL}, torch)...")
+        # FORCE CPU
+        return HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL,
+            model_kwargs={'device': 'cpu'}
+        )
+    if backend == "onnx":
+        print(f"Initializing AI Model ({EMBEDDING_MODEL}, onnx int8 from '{ONNX_MODEL_DIR}')...")
+        return OnnxEmbeddings(ONNX_MODEL_DIR)
+    raise ValueError(f"Unknown embedding backend: {backend} (expected one of {BACKENDS})")
+
+
+def embedding_namespace(backend=EMBEDDING_BACKEND):
+    """Cache namespace: vectors from different backends must never be mixed"""
+    return EMBEDDING_MODEL if backend == "torch" else f"{EMBEDDING_MODEL}-{backend}-int8"
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Defers importing and loading the model until the first embedding (or an
+    explicit warm_up), so the API can bind and serve probes immediately.
+    """
+
+    def __init__(self, backend=EMBEDDING_BACKEND):
+        self.backend = backend
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = get_embeddings(self.backend)
+        return self._model
+
+    def warm_up(self):
+        """Loads the model and runs one forward pass; returns the seconds it took"""
+        start = time.perf_counter()
+        self.model.embed_query("warm-up")
+        return time.perf_counter() - start
+
+    def embed_documents(self, texts):
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime, int8-quantized by export_onnx.py.
+
+    Reproduces the sentence-transformers pipeline: WordPiece tokenization
+    truncated to the model's max_seq_length, transformer forward pass, mean
+    pooling over real tokens and L2 normalization. Needs only onnxruntime,
+    tokenizers and numpy.
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, threads=ONNX_THREADS, batch_size=ONNX_BATCH_SIZE):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if not os.path.exists(os.path.join(model_dir, "model.onnx")):
+            raise FileNotFoundError(f"No ONNX model in '{model_dir}'. Run: python export_onnx.py")
+
+        with open(os.path.join(model_dir, "embedding_config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=config["pad_token_id"], pad_token=config["pad_token"])
+        self.normalize = config.get("normalize", True)
+        self.batch_size = batch_size
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def embed_documents(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed_batch(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text):
+        return self._embed_batch([text])[0].tolist()
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real (non-padding) tokens
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            pooled = pooled / np.clip(norms, 1e-12, None)
+        return pooled.astype(np.float32)
@@ -0,0 +1,129 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# --- CONFIGURATION ---
+DEFAULT_MAX_SIZE = 4096
+
+
+def normalize_text(text):
+    """
+    Cache key for a text: collapsed whitespace, lower case.
+    all-MiniLM-L6-v2 uses an uncased tokenizer that ignores whitespace runs,
+    so texts with the same key always produce the same vector.
+    """
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps any langchain Embeddings with an in-memory LRU cache and an optional
+    SQLite store so vectors survive restarts. Drop-in for the embedding_function
+    given to Chroma, so retrieval and batch paths share the same cache.
+    """
+
+    def __init__(self, inner, max_size=DEFAULT_MAX_SIZE, path=None, namespace="default"):
+        self.inner = inner
+        self.max_size = max_size
+        # Namespace keeps vectors of different models apart in a shared store
+        self.namespace = namespace
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "namespace TEXT, key TEXT, vector BLOB, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.commit()
+
+    # --- Embeddings interface ---
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    def embed_documents(self, texts):
+        keys = [normalize_text(t) for t in texts]
+        found = {}
+        missing = {}
+
+        with self._lock:
+            for key, text in zip(keys, texts):
+                if key in found or key in missing:
+                    continue
+                vector = self._get(key)
+                if vector is None:
+                    missing[key] = text
+                else:
+                    found[key] = vector
+            self.hits += len(keys) - sum(1 for k in keys if k in missing)
+            self.misses += len(missing)
+
+        if missing:
+            # One batched forward pass for everything we have not seen yet
+            vectors = self.inner.embed_documents(list(missing.values()))
+            with self._lock:
+                for key, vector in zip(missing, vectors):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    self._put(key, vector, persist=True)
+                    found[key] = vector
+
+        return [found[k].tolist() for k in keys]
+
+    # --- Cache internals (call with the lock held) ---
+    def _get(self, key):
+        vector = self._lru.get(key)
+        if vector is not None:
+            self._lru.move_to_end(key)
+            return vector
+
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                vector = np.frombuffer(row[0], dtype=np.float32)
+                self._put(key, vector, persist=False)
+                return vector
+        return None
+
+    def _put(self, key, vector, persist):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+        if persist and self._conn is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (namespace, key, vector) VALUES (?, ?, ?)",
+                (self.namespace, key, vector.tobytes())
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "size": len(self._lru),
+                "max_size": self.max_size,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        """Drops the in-memory entries (the on-disk store is kept)"""
+        with self._lock:
+            self._lru.clear()
@@ -1,68 +1,208 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
+
+# Evaluation queries must be scored independently: no answer may come from a
+# near-duplicate query's cached response
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+
 from rag_engine import RecommendationEngine
 
 # --- CONFIGURATION ---
-# If you have the "Labelled Train Set" CSV from the PDF, 
+# If you have the "Labelled Train Set" CSV from the PDF,
 # save it as 'ground_truth.csv' and run this script.
-GROUND_TRUTH_FILE = "ground_truth.csv" 
-
-def calculate_recall_at_k(engine, test_data, k=10):
-    total_recall = 0
-    num_queries = len(test_data)
-    
-    print(f"Starting Evaluation on {num_queries} queries (K={k})...")
-    
-    for idx, row in test_data.iterrows():
-        query = row['Query']
-        # Ground truth URLs (assuming comma-separated in CSV or just one per row)
-        # Adjust logic depending on actual CSV format provided in PDF
-        actual_urls = [row['Assessment_url'].strip()] 
-        
-        # Get System Predictions
-        try:
-            result = engine.search_and_recommend(query)
-            recommendations = result.get("recommended_assessments", [])
-            predicted_urls = [rec['url'] for rec in recommendations[:k]]
-            
-            # Calculate Intersection
-            # How many relevant items did we find?
-            relevant_retrieved = len(set(predicted_urls).intersection(set(actual_urls)))
-            
-            # Recall Formula: (Relevant_Retrieved) / (Total_Relevant)
-            # If total_relevant is 0, recall is 0
-            if len(actual_urls) > 0:
-                recall = relevant_retrieved / len(actual_urls)
-            else:
-                recall = 0
-                
-            total_recall += recall
-            print(f"Query {idx+1}: Recall@{k} = {recall:.2f}")
-            
-        except Exception as e:
-            print(f"Error evaluating query {idx+1}: {e}")
-    
-    # Mean Recall
-    mean_recall = total_recall / num_queries
-    print(f"\n--- FINAL RESULTS ---")
-    print(f"Mean Recall@{k}: {mean_recall:.4f}")
-    return mean_recall
+GROUND_TRUTH_FILE = "ground_truth.csv"
+# LLM responses are cached here (keyed by prompt + model), so reruns skip Gemini
+LLM_CACHE_FILE = ".llm_eval_cache.sqlite3"
+DEFAULT_KS = "1,3,5,10"
+CONCURRENCY = 8
 
-if __name__ == "__main__":
-    # Create dummy data if file doesn't exist, just to show the code works
-    import os
-    if not os.path.exists(GROUND_TRUTH_FILE):
-        print("Warning: 'ground_truth.csv' not found.")
-        print("Creating a dummy test set to demonstrate evaluation logic...")
-        data = {
-            "Query": ["Need a Java developer", "Sales manager needed"],
-            "Assessment_url": [
-                "https://www.shl.com/products/product-catalog/view/java-8-new/",
-                "https://www.shl.com/products/product-catalog/view/sales-manager/" # Example URL
-            ]
+
+def url_key(url):
+    """Catalog slug of an assessment URL, so /solutions/products/... and /products/... variants match"""
+    url = str(url).strip().rstrip("/").lower()
+    return url.rsplit("/view/", 1)[-1] if "/view/" in url else url
+
+
+def load_ground_truth(path):
+    """{query: [relevant url keys]} with every row for the same query grouped together"""
+    df = pd.read_excel(path) if path.endswith((".xlsx", ".xls")) else pd.read_csv(path)
+    ground_truth = OrderedDict()
+    for query, url in zip(df["Query"], df["Assessment_url"]):
+        if pd.isna(query) or pd.isna(url):
+            continue
+        relevant = ground_truth.setdefault(str(query).strip(), [])
+        if url_key(url) not in relevant:
+            relevant.append(url_key(url))
+    return ground_truth
+
+
+def demo_ground_truth():
+    # Just to show the code works when no labelled set is present
+    return OrderedDict([
+        ("Need a Java developer", [url_key("https://www.shl.com/products/product-catalog/view/java-8-new/")]),
+        ("Sales manager needed", [url_key("https://www.shl.com/products/product-catalog/view/sales-manager/")]),
+    ])
+
+
+def metrics_at_ks(ranked, relevant, ks):
+    """
+    Recall@K and AP@K for every K from one ranked list.
+    AP@K = sum over hits at rank i <= K of precision@i, divided by min(K, |relevant|).
+    """
+    relevant = set(relevant)
+    depth = max(ks)
+    hits = np.array([key in relevant for key in ranked[:depth]], dtype=np.float64)
+    hits = np.pad(hits, (0, depth - len(hits)))
+    cumulative = np.cumsum(hits)
+    precision_hits = cumulative / np.arange(1, depth + 1) * hits
+
+    scores = {}
+    for k in ks:
+        scores[k] = {
+            "recall": cumulative[k - 1] / len(relevant),
+            "ap": precision_hits[:k].sum() / min(k, len(relevant)),
+        }
+    return scores
+
+
+def rank_retrieval(engine, queries, depth):
+    """Retrieval stage alone: the fused candidate list, no LLM"""
+    docs_per_query = engine.retrieve_many(queries, k=depth)
+    return [[url_key(doc.metadata["url"]) for doc in docs] for docs in docs_per_query]
+
+
+async def rank_end_to_end(engine, queries, concurrency, selection=None):
+    """Full pipeline, `concurrency` queries in flight; failed queries rank nothing"""
+    limiter = asyncio.Semaphore(concurrency)
+    sources = {}
+    tokens = []
+
+    async def one(query):
+        async with limiter:
+            try:
+                result = await engine.asearch_and_recommend(query, selection=selection)
+            except Exception as e:
+                print(f"Error evaluating {query[:50]!r}: {e}")
+                return []
+            sources[result["source"]] = sources.get(result["source"], 0) + 1
+            if "tokens" in result:
+                tokens.append(result["tokens"])
+            return [url_key(rec["url"]) for rec in result["recommended_assessments"]]
+
+    ranked = await asyncio.gather(*(one(q) for q in queries))
+    return ranked, sources, tokens
+
+
+def token_summary(tokens):
+    """Mean candidates and prompt tokens per LLM request (provider counts when reported)"""
+    if not tokens:
+        return None
+    reported = [t["input"] for t in tokens if t["input"] is not None]
+    return {
+        "llm_requests": len(tokens),
+        "mean_candidates": float(np.mean([t["candidates"] for t in tokens])),
+        "mean_prompt_tokens_estimate": float(np.mean([t["prompt_estimate"] for t in tokens])),
+        "mean_input_tokens": float(np.mean(reported)) if reported else None,
+    }
+
+
+def enable_llm_cache(path=LLM_CACHE_FILE):
+    from langchain_core.globals import set_llm_cache
+    from langchain_community.cache import SQLiteCache
+    set_llm_cache(SQLiteCache(database_path=path))
+
+
+def evaluate(engine, ground_truth, ks, mode="end_to_end", concurrency=CONCURRENCY, depth=None, selection=None):
+    """
+    Mean Recall@K and MAP@K for every K in ks over the grouped ground truth.
+    mode "retrieval" scores the ranked candidates (to `depth`, default max K);
+    "end_to_end" scores the final recommendations (selection: "llm" or "local").
+    """
+    queries = list(ground_truth)
+    start = time.perf_counter()
+    sources = tokens = None
+    if mode == "retrieval":
+        ranked = rank_retrieval(engine, queries, depth or max(ks))
+    else:
+        ranked, sources, token_counts = asyncio.run(rank_end_to_end(engine, queries, concurrency, selection))
+        tokens = token_summary(token_counts)
+    elapsed = time.perf_counter() - start
+
+    per_query = [metrics_at_ks(r, ground_truth[q], ks) for q, r in zip(queries, ranked)]
+    summary = {
+        k: {
+            "mean_recall": float(np.mean([m[k]["recall"] for m in per_query])),
+            "map": float(np.mean([m[k]["ap"] for m in per_query])),
         }
-        df = pd.DataFrame(data)
+        for k in ks
+    }
+
+    print(f"\n--- FINAL RESULTS ({mode}, {len(queries)} queries, {elapsed:.2f}s) ---")
+    if sources:
+        print("Sources: " + ", ".join(f"{s}={n}" for s, n in sorted(sources.items())))
+    if tokens:
+        reported = tokens["mean_input_tokens"]
+        print(f"LLM: {tokens['mean_candidates']:.1f} candidates, ~{tokens['mean_prompt_tokens_estimate']:.0f} prompt tokens "
+              f"per request" + (f" ({reported:.0f} reported by the provider)" if reported is not None else ""))
+    print(f"{'K':>4} {'Mean Recall@K':>14} {'MAP@K':>8}")
+    for k in ks:
+        print(f"{k:>4} {summary[k]['mean_recall']:>14.4f} {summary[k]['map']:>8.4f}")
+
+    report_k = 10 if 10 in ks else max(ks)
+    print(f"\nPer query (Recall@{report_k}):")
+    for query, metrics in zip(queries, per_query):
+        print(f"  {metrics[report_k]['recall']:.2f}  {query[:70]}")
+
+    return {
+        "mode": mode,
+        "selection": selection,
+        "queries": len(queries),
+        "seconds": elapsed,
+        "sources": sources,
+        "tokens": tokens,
+        "metrics": {str(k): v for k, v in summary.items()},
+        "per_query": [
+            {"query": q, **{f"recall@{k}": m[k]["recall"] for k in ks}, **{f"ap@{k}": m[k]["ap"] for k in ks}}
+            for q, m in zip(queries, per_query)
+        ],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mean Recall@K and MAP@K over a labelled query set")
+    parser.add_argument("--ground-truth", default=GROUND_TRUTH_FILE, help="CSV/XLSX with Query, Assessment_url")
+    parser.add_argument("--mode", choices=["end_to_end", "retrieval"], default="end_to_end",
+                        help="retrieval = score the candidate list only (no LLM calls)")
+    parser.add_argument("--selection", choices=["llm", "local"], help="end_to_end: who picks the final list (default: SELECTION_MODE)")
+    parser.add_argument("--ks", default=DEFAULT_KS, help="Comma-separated K values, e.g. 1,3,5,10,15,30")
+    parser.add_argument("--depth", type=int, help="Candidates to retrieve in retrieval mode (default: max K)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Queries in flight (end_to_end)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Always call the LLM")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    ks = sorted({int(k) for k in args.ks.split(",")})
+
+    if os.path.exists(args.ground_truth):
+        ground_truth = load_ground_truth(args.ground_truth)
     else:
-        df = pd.read_csv(GROUND_TRUTH_FILE)
+        print(f"Warning: '{args.ground_truth}' not found.")
+        print("Using a dummy test set to demonstrate evaluation logic...")
+        ground_truth = demo_ground_truth()
+
+    if args.mode == "end_to_end" and args.selection != "local" and not args.no_llm_cache:
+        enable_llm_cache()
 
     engine = RecommendationEngine()
-    calculate_recall_at_k(engine, df, k=10)
\ No newline at end of file
+    results = evaluate(engine, ground_truth, ks, args.mode, args.concurrency, args.depth, args.selection)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to '{args.output}'.")
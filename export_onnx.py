@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+from embedding_backends import EMBEDDING_MODEL, ONNX_MODEL_DIR
+
+# --- CONFIGURATION ---
+OPSET = 17
+
+
+def export(output_dir=ONNX_MODEL_DIR, quantize=True):
+    """
+    Exports the sentence-transformers model used by the torch backend to
+    ONNX, then applies dynamic int8 quantization to its weights. Only this
+    one-off step needs torch and onnx; serving needs onnxruntime + tokenizers.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    print(f"Loading {EMBEDDING_MODEL}...")
+    st_model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    sample = tokenizer(["An example sentence", "Another, slightly longer example sentence"],
+                       padding=True, return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fp32_path = os.path.join(tmp, "model_fp32.onnx")
+        print("Exporting to ONNX...")
+        with torch.no_grad():
+            torch.onnx.export(
+                transformer,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                fp32_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=OPSET,
+                dynamo=False
+            )
+
+        model_path = os.path.join(output_dir, "model.onnx")
+        if quantize:
+            print("Quantizing weights to int8...")
+            quantize_dynamic(fp32_path, model_path, weight_type=QuantType.QInt8)
+        else:
+            shutil.copyfile(fp32_path, model_path)
+
+    # The fast tokenizer's tokenizer.json is all the serving side needs
+    tokenizer.save_pretrained(output_dir)
+    config = {
+        "model": EMBEDDING_MODEL,
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pooling": "mean",
+        "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+        "quantized": quantize
+    }
+    with open(os.path.join(output_dir, "embedding_config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    size_mb = os.path.getsize(model_path) / 1e6
+    print(f"Success! ONNX model written to '{output_dir}' ({size_mb:.1f} MB).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export all-MiniLM-L6-v2 to an int8 ONNX model")
+    parser.add_argument("--output", default=ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true", help="Keep fp32 weights")
+    args = parser.parse_args()
+    export(args.output, quantize=not args.no_quantize)
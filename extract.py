@@ -0,0 +1,171 @@
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAVE_LXML = True
+except ImportError: # BeautifulSoup + html.parser still works, just slower
+    HAVE_LXML = False
+
+# --- CONFIGURATION ---
+BASE_URL = "https://www.shl.com/products/product-catalog/"
+
+TYPE_MAP = {
+    "A": "Ability & Aptitude",
+    "B": "Biodata & Situational Judgement",
+    "C": "Competencies",
+    "D": "Development & 360",
+    "E": "Assessment Exercises",
+    "K": "Knowledge & Skills",
+    "P": "Personality & Behavior",
+    "S": "Simulations"
+}
+
+DURATION_PATTERN = re.compile(r'(?:Time|Duration)[\s\w]*?(\d+)\s*(?:min|minute)', re.IGNORECASE)
+
+if HAVE_LXML:
+    def _class_test(name):
+        return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+    # Visible text only: BeautifulSoup's get_text() skips script/style/template strings and comments
+    _VISIBLE = "[not(ancestor::script or ancestor::style or ancestor::template)]"
+    PAGE_TEXT = etree.XPath("//text()" + _VISIBLE)  # only for pages without the content div
+    SUBTREE_TEXT = etree.XPath(".//text()" + _VISIBLE)
+    META_DESCRIPTION = etree.XPath("//meta[@name='description']")
+    CONTENT_DIV = etree.XPath(f"//div[{_class_test('product-layout__content')}]")
+    CATALOG_ROWS = etree.XPath("//tr[@data-entity-id]")
+    ROW_TITLE_LINK = etree.XPath(f".//td[{_class_test('custom__table-heading__title')}]//a")
+    ROW_KEYS = etree.XPath(f".//span[{_class_test('product-catalogue__key')}]")
+
+
+def _joined_text(strings, separator):
+    """Same as BeautifulSoup's get_text(separator, strip=True) over these strings"""
+    return separator.join(s for s in (s.strip() for s in strings) if s)
+
+
+def _parse(html):
+    try:
+        return lxml.html.document_fromstring(html)
+    except (ValueError, etree.ParserError):
+        return None
+
+
+def extract_catalog_rows(html, base_url=BASE_URL):
+    """Name, URL and test types for every row of a catalog page."""
+    root = _parse(html) if HAVE_LXML else None
+    if root is None:
+        return extract_catalog_rows_bs4(html, base_url)
+
+    page_results = []
+    for row in CATALOG_ROWS(root):
+        links = ROW_TITLE_LINK(row)
+        if not links:
+            continue
+
+        name = _joined_text(SUBTREE_TEXT(links[0]), "")
+        href = links[0].attrib["href"]
+        url = urljoin(base_url, href) if href.startswith("/") else href
+
+        found_types = []
+        for key in ROW_KEYS(row):
+            letter = _joined_text(SUBTREE_TEXT(key), "")
+            if letter in TYPE_MAP:
+                found_types.append(TYPE_MAP[letter])
+
+        page_results.append(_catalog_record(name, url, found_types))
+
+    return page_results
+
+
+def extract_details(assessment, html):
+    """Fills description, duration and adaptive support from a product page."""
+    root = _parse(html) if HAVE_LXML else None
+    if root is None:
+        return extract_details_bs4(assessment, html)
+
+    # Duration and adaptive support are read from the product content div, the whole page only when it is missing
+    main_div = CONTENT_DIV(root)
+    div_text = SUBTREE_TEXT(main_div[0]) if main_div else None
+    text_content = _joined_text(div_text if main_div else PAGE_TEXT(root), " ")
+
+    # 1. Description
+    desc = ""
+    meta_desc = META_DESCRIPTION(root)
+    if meta_desc:
+        desc = (meta_desc[0].get("content") or "").strip()
+
+    if len(desc) < 10:
+        desc = _joined_text(div_text, "")[:800] if main_div else text_content[:500]
+
+    return _fill_details(assessment, desc, text_content)
+
+
+# --- BeautifulSoup path (used when lxml is missing or cannot parse the page) ---
+def extract_catalog_rows_bs4(html, base_url=BASE_URL):
+    soup = BeautifulSoup(html, "html.parser")
+
+    page_results = []
+    for row in soup.select("tr[data-entity-id]"):
+        name_tag = row.select_one("td.custom__table-heading__title a")
+        if not name_tag:
+            continue
+
+        name = name_tag.get_text(strip=True)
+        href = name_tag["href"]
+        url = urljoin(base_url, href) if href.startswith("/") else href
+
+        found_types = []
+        for k in row.select("span.product-catalogue__key"):
+            letter = k.get_text(strip=True)
+            if letter in TYPE_MAP:
+                found_types.append(TYPE_MAP[letter])
+
+        page_results.append(_catalog_record(name, url, found_types))
+
+    return page_results
+
+
+def extract_details_bs4(assessment, html):
+    soup = BeautifulSoup(html, "html.parser")
+    main_div = soup.select_one("div.product-layout__content")
+    text_content = (main_div if main_div is not None else soup).get_text(" ", strip=True)
+
+    desc = ""
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    if meta_desc:
+        desc = meta_desc.get("content", "").strip()
+
+    if len(desc) < 10:
+        desc = main_div.get_text(strip=True)[:800] if main_div else text_content[:500]
+
+    return _fill_details(assessment, desc, text_content)
+
+
+# --- Shared record building ---
+def _catalog_record(name, url, found_types):
+    if not found_types:
+        found_types = ["General Assessment"]
+
+    return {
+        "name": name,
+        "url": url,
+        # Deduplicated in first-seen order so output is stable across runs
+        "test_type": list(dict.fromkeys(found_types)),
+        "remote_support": "Yes",
+        "adaptive_support": "No"
+    }
+
+
+def _fill_details(assessment, desc, text_content):
+    assessment['description'] = desc
+
+    duration_match = DURATION_PATTERN.search(text_content)
+    assessment['duration'] = int(duration_match.group(1)) if duration_match else 0
+
+    if "adaptive" in text_content.lower():
+        assessment['adaptive_support'] = "Yes"
+
+    return assessment
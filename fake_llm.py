@@ -0,0 +1,64 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# Matches the "3|name|types|description" candidate lines built by RecommendationEngine
+CANDIDATE_ID = re.compile(r"^(\d+)\|", re.M)
+
+
+class FakeLLM(BaseChatModel):
+    """
+    Local stand-in for ChatGoogleGenerativeAI, used for load tests.
+
+    Sleeps for `latency` (+/- `jitter`) seconds, fails with probability
+    `failure_rate`, and otherwise selects the first `num_selected`
+    candidate IDs found in the prompt.
+    """
+
+    latency: float = 1.0
+    jitter: float = 0.0
+    failure_rate: float = 0.0
+    num_selected: int = 7
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            latency=float(os.getenv("FAKE_LLM_LATENCY", "1.0")),
+            jitter=float(os.getenv("FAKE_LLM_JITTER", "0.0")),
+            failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0.0")),
+        )
+
+    @property
+    def _llm_type(self):
+        return "fake-llm"
+
+    def _delay(self):
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def _respond(self, messages):
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Simulated LLM failure")
+
+        prompt = "\n".join(str(m.content) for m in messages)
+        ids = [int(i) for i in CANDIDATE_ID.findall(prompt)][:self.num_selected]
+        content = json.dumps({"selected_ids": ids})
+        # Rough token counts, so token reporting works without Gemini
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self._delay())
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self._delay())
+        return self._respond(messages)
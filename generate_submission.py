@@ -1,9 +1,33 @@
-import pandas as pd
+import argparse
+import asyncio
+import json
+import os
 import time
+
+import pandas as pd
+
+# Every query must be answered on its own: no answer may come from a
+# near-duplicate query's cached response
+os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+
 from rag_engine import RecommendationEngine
+from rate_limit import AdaptiveTokenBucket, is_rate_limited, retry_after
 
 # --- CONFIGURATION ---
 OUTPUT_CSV = "submission.csv"
+# One JSON line per finished query; reruns skip everything already in it
+CHECKPOINT_FILE = "submission_checkpoint.jsonl"
+# Gemini requests per minute to start at (and never exceed); 429s lower it adaptively
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+MAX_IN_FLIGHT = 16
+MAX_ATTEMPTS = 5
+# Pause after a 429 when the error carries no Retry-After (doubles per attempt)
+BACKOFF_SECONDS = 10.0
+# Fields tried, in order, for the query text and its label in JSONL/CSV input
+QUERY_FIELDS = ("query", "Query", "text", "body")
+LABEL_FIELDS = ("label", "Label", "id", "request_id")
+# Result sources that never called Gemini, so they do not count against the quota
+NO_LLM_SOURCES = ("lexical", "cache", "local", "no_match")
 
 # The 9 Test Queries (Derived from PDF Appendix/Dataset)
 TEST_QUERIES = [
@@ -18,48 +42,145 @@ TEST_QUERIES = [
     "Looking for a marketing specialist with digital marketing and content creation skills."
 ]
 
-def generate_csv():
-    print("Initializing Engine...")
-    engine = RecommendationEngine()
-    
-    submission_rows = []
-
-    print(f"Processing {len(TEST_QUERIES)} queries...")
-    
-    for i, query in enumerate(TEST_QUERIES):
-        print(f"[{i+1}/{len(TEST_QUERIES)}] predicting for: {query[:50]}...")
-        
-        # Get recommendations
-        try:
-            result = engine.search_and_recommend(query)
-            recs = result.get("recommended_assessments", [])
-            
-            # Format requires: Query Name | Recommendation URL
-            # The PDF format example implies repeating the query name for each recommendation
-            query_label = f"Query {i+1}" 
-            
-            for rec in recs:
-                submission_rows.append({
-                    "Query": query_label, # Or the actual query text if they prefer
-                    "Assessment_url": rec['url']
-                })
-                
-            # Sleep to avoid hitting API Rate Limits again
-            time.sleep(2) 
-            
-        except Exception as e:
-            print(f"Error on query {i}: {e}")
-
-    # Create DataFrame
-    df = pd.DataFrame(submission_rows)
-    
+
+def load_queries(path=None):
+    """
+    [(label, query)] from a CSV or JSONL file (or the built-in list), duplicates dropped.
+    Labels come from a label/id column when there is one, otherwise "Query N".
+    """
+    if path is None:
+        records = [{"query": q} for q in TEST_QUERIES]
+    elif path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    else:
+        records = pd.read_csv(path).to_dict("records")
+
+    queries = []
+    seen = set()
+    for record in records:
+        query_field = next((f for f in QUERY_FIELDS if f in record), None)
+        if query_field is None or pd.isna(record[query_field]) or not str(record[query_field]).strip():
+            continue
+        query = str(record[query_field]).strip()
+        if query in seen:
+            continue
+        seen.add(query)
+        label_field = next((f for f in LABEL_FIELDS if f in record), None)
+        label = str(record[label_field]) if label_field else f"Query {len(queries) + 1}"
+        queries.append((label, query))
+    return queries
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """{query: entry} for every query a previous run finished"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+            done[entry["query"]] = entry
+    return done
+
+
+async def predict_all(engine, pending, checkpoint, rpm, max_in_flight):
+    """
+    Runs every query through the engine. Starts are paced by an adaptive
+    token bucket; a 429 halves the rate, pauses everyone and retries the
+    query. Answers that needed no Gemini call give their token back.
+    Each finished query is appended to the checkpoint at once.
+    """
+    bucket = AdaptiveTokenBucket(rate=rpm / 60, capacity=max(1.0, min(max_in_flight, rpm / 60 * 5)))
+    limiter = asyncio.Semaphore(max_in_flight)
+    finished = 0
+
+    async def one(label, query):
+        nonlocal finished
+        async with limiter:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                await bucket.acquire()
+                try:
+                    # Last attempt accepts the vector fallback so every query gets an answer
+                    result = await engine.asearch_and_recommend(query, fallback=attempt == MAX_ATTEMPTS)
+                    if result["source"] in NO_LLM_SOURCES:
+                        bucket.refund()
+                    else:
+                        bucket.on_success()
+                    break
+                except Exception as e:
+                    if is_rate_limited(e):
+                        cooldown = retry_after(e, BACKOFF_SECONDS * 2 ** (attempt - 1))
+                        bucket.on_rate_limited(cooldown)
+                        print(f"429 on {label}. Rate now {bucket.rate * 60:.1f}/min, pausing {cooldown:.0f}s.")
+                    else:
+                        print(f"Error on {label} (attempt {attempt}/{MAX_ATTEMPTS}): {e}")
+                        await asyncio.sleep(min(BACKOFF_SECONDS, 2 ** attempt))
+            else:
+                print(f"Giving up on {label} for this run. A rerun will retry it.")
+                return
+
+            entry = {
+                "label": label,
+                "query": query,
+                "source": result["source"],
+                "urls": [rec["url"] for rec in result["recommended_assessments"]],
+            }
+            checkpoint.write(json.dumps(entry) + "\n")
+            checkpoint.flush()
+            finished += 1
+            print(f"[{finished}/{len(pending)}] {label}: {len(entry['urls'])} assessments ({entry['source']})")
+
+    await asyncio.gather(*(one(label, query) for label, query in pending))
+
+
+def generate_csv(input_path=None, output_csv=OUTPUT_CSV, checkpoint_path=CHECKPOINT_FILE,
+                 rpm=GEMINI_RPM, max_in_flight=MAX_IN_FLIGHT):
+    queries = load_queries(input_path)
+    done = load_checkpoint(checkpoint_path)
+    pending = [(label, query) for label, query in queries if query not in done]
+    print(f"{len(queries)} queries: {len(queries) - len(pending)} already in '{checkpoint_path}', "
+          f"{len(pending)} to run.")
+
+    if pending:
+        print("Initializing Engine...")
+        engine = RecommendationEngine()
+        start = time.perf_counter()
+        with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+            asyncio.run(predict_all(engine, pending, checkpoint, rpm, max_in_flight))
+        print(f"Processed {len(pending)} queries in {time.perf_counter() - start:.1f}s.")
+        done = load_checkpoint(checkpoint_path)
+
+    missing = [label for label, query in queries if query not in done]
+    if missing:
+        print(f"Warning: {len(missing)} queries have no result yet ({', '.join(missing[:5])}...). Rerun to retry them.")
+
+    # Format requires: Query Name | Recommendation URL, one row per recommendation, in input order
+    submission_rows = [
+        {"Query": label, "Assessment_url": url}
+        for label, query in queries if query in done
+        for url in done[query]["urls"]
+    ]
+    df = pd.DataFrame(submission_rows, columns=["Query", "Assessment_url"])
+
     # Verify columns
     print("\nSample Output:")
     print(df.head())
-    
+
     # Save
-    df.to_csv(OUTPUT_CSV, index=False)
-    print(f"\nSUCCESS: Submission file saved to {OUTPUT_CSV}")
+    df.to_csv(output_csv, index=False)
+    print(f"\nSUCCESS: Submission file saved to {output_csv}")
+
 
 if __name__ == "__main__":
-    generate_csv()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the submission CSV with rate-limited, checkpointed LLM calls")
+    parser.add_argument("--input", help="CSV (Query column) or JSONL (query/body field) file; default: the 9 test queries")
+    parser.add_argument("--output", default=OUTPUT_CSV)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--rpm", type=float, default=GEMINI_RPM, help="Starting and maximum requests per minute")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    args = parser.parse_args()
+    generate_csv(args.input, args.output, args.checkpoint, args.rpm, args.max_in_flight)
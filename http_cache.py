@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+
+def body_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """
+    On-disk cache of crawled pages: validators (ETag / Last-Modified), a hash
+    of the body and the record parsed from it. Lets a re-crawl send
+    conditional requests and skip parsing for pages that did not change.
+    """
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "body_hash TEXT, record TEXT, fetched_at REAL)"
+        )
+        self.conn.commit()
+
+    def get(self, key):
+        row = self.conn.execute(
+            "SELECT etag, last_modified, body_hash, record FROM pages WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "body_hash": row[2], "record": json.loads(row[3])}
+
+    def put(self, key, etag, last_modified, digest, record):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+            (key, etag, last_modified, digest, json.dumps(record), time.time())
+        )
+        self.conn.commit()
+
+    def touch(self, key):
+        self.conn.execute("UPDATE pages SET fetched_at = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def close(self):
+        self.conn.close()
+
+
+class CrawlCheckpoint:
+    """
+    Append-only JSONL log of finished detail records. An interrupted crawl
+    reloads it and skips those URLs; a completed crawl deletes it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            valid_bytes = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break # Torn last line from the interruption
+                    self.done[record["url"]] = record
+                    valid_bytes += len(line)
+            # Drop the torn tail so new records start on a clean line
+            with open(path, "r+b") as f:
+                f.truncate(valid_bytes)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def add(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    def finish(self):
+        """Called once the crawl completed: the checkpoint is no longer needed"""
+        self._file.close()
+        os.remove(self.path)
+
+    def close(self):
+        self._file.close()
+
+
+def diff_records(old_records, new_records):
+    """Which assessment URLs were added, changed or removed between two crawls"""
+    old = {r["url"]: r for r in old_records}
+    new = {r["url"]: r for r in new_records}
+
+    def comparable(record):
+        return dict(record, test_type=sorted(record.get("test_type", [])))
+
+    return {
+        "added": sorted(url for url in new if url not in old),
+        "changed": sorted(url for url in new if url in old and comparable(new[url]) != comparable(old[url])),
+        "removed": sorted(url for url in old if url not in new),
+    }
@@ -0,0 +1,177 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+# --- CONFIGURATION ---
+DB_DIR = "chroma_db"
+# Written after every build so running engines can detect a rebuilt store
+INDEX_VERSION_FILE = os.path.join(DB_DIR, "index_version")
+# Which embedding backend produced the stored vectors (see embedding_backends.py)
+EMBEDDING_BACKEND_FILE = os.path.join(DB_DIR, "embedding_backend")
+# Compact, memory-mappable copies of the store for serving, one directory per
+# version. CURRENT names the live one; every API worker maps the same files
+# read-only, so the OS page cache holds a single shared copy.
+SNAPSHOTS_DIR = os.path.join(DB_DIR, "snapshots")
+CURRENT_FILE = os.path.join(SNAPSHOTS_DIR, "CURRENT")
+# Older versions kept on disk for workers that have not switched yet
+KEEP_SNAPSHOTS = 3
+
+SNAPSHOT_MATRIX = "embeddings.npy"
+SNAPSHOT_DOCUMENTS = "documents.npy"
+SNAPSHOT_COLUMNS = "columns.json"
+
+
+def new_version():
+    return str(time.time_ns())
+
+
+def write_index_version(version=None):
+    version = version or new_version()
+    _write_text(INDEX_VERSION_FILE, version)
+    return version
+
+
+def read_index_version():
+    """Current index version, or None for a store built before versioning"""
+    try:
+        with open(INDEX_VERSION_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_embedding_backend(backend):
+    _write_text(EMBEDDING_BACKEND_FILE, backend)
+
+
+def read_embedding_backend():
+    """Backend the stored vectors came from; stores predating the file were built with torch"""
+    try:
+        with open(EMBEDDING_BACKEND_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or "torch"
+    except FileNotFoundError:
+        return "torch"
+
+
+class MappedTable:
+    """
+    Read-only metadata table backed by one memory-mapped .npy column per key
+    (fixed-width strings or int64). Rows are decoded into dicts on access,
+    so the snapshot's vectors and columns stay in the shared page cache.
+    Each worker still builds its own lexical index and response records
+    from the catalog metadata (about 1.5 MB for 377 assessments).
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, row):
+        return {key: column[row].item() for key, column in self.columns.items()}
+
+    def __iter__(self):
+        return (self[row] for row in range(self.rows))
+
+    def column(self, key):
+        return self.columns[key]
+
+
+def write_snapshot(embeddings, metadatas, documents, version):
+    """
+    Exports the store as a normalized float32 matrix, a fixed-width document
+    column and one column per metadata key, in a new directory for this
+    version. Nothing serves from it until publish_snapshot(version).
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix = np.ascontiguousarray(matrix / norms)
+
+    os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+    final_dir = os.path.join(SNAPSHOTS_DIR, version)
+    tmp_dir = os.path.join(SNAPSHOTS_DIR, f".tmp-{version}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, SNAPSHOT_MATRIX), matrix)
+    np.save(os.path.join(tmp_dir, SNAPSHOT_DOCUMENTS), np.array(list(documents), dtype=np.str_))
+
+    keys = list(dict.fromkeys(key for meta in metadatas for key in meta))
+    columns = []
+    for i, key in enumerate(keys):
+        values = [meta.get(key) for meta in metadatas]
+        if all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            column = np.array(values, dtype=np.int64)
+        else:
+            column = np.array(["" if v is None else str(v) for v in values], dtype=np.str_)
+        file_name = f"meta_{i}.npy"
+        np.save(os.path.join(tmp_dir, file_name), column)
+        columns.append({"key": key, "file": file_name})
+
+    with open(os.path.join(tmp_dir, SNAPSHOT_COLUMNS), "w", encoding="utf-8") as f:
+        json.dump({"rows": len(metadatas), "columns": columns}, f)
+
+    # The directory appears complete or not at all
+    shutil.rmtree(final_dir, ignore_errors=True)
+    os.rename(tmp_dir, final_dir)
+    print(f"Index snapshot {version} written ({matrix.shape[0]} x {matrix.shape[1]}).")
+    return final_dir
+
+
+def publish_snapshot(version):
+    """Atomically points CURRENT at this version, then prunes old snapshot directories"""
+    _write_text(CURRENT_FILE, version)
+
+    versions = sorted(
+        name for name in os.listdir(SNAPSHOTS_DIR)
+        if os.path.isdir(os.path.join(SNAPSHOTS_DIR, name)) and not name.startswith(".")
+    )
+    # Workers still mapping a pruned version keep working: the files stay valid until unmapped
+    for old in versions[:-KEEP_SNAPSHOTS]:
+        if old != version:
+            shutil.rmtree(os.path.join(SNAPSHOTS_DIR, old), ignore_errors=True)
+
+
+def current_snapshot_version():
+    try:
+        with open(CURRENT_FILE, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def load_snapshot(version=None):
+    """
+    Memory-maps the CURRENT (or given) snapshot read-only.
+    Returns (version, matrix, MappedTable, documents), or None if there is none.
+    """
+    version = version or current_snapshot_version()
+    if version is None:
+        return None
+    snapshot_dir = os.path.join(SNAPSHOTS_DIR, version)
+    try:
+        with open(os.path.join(snapshot_dir, SNAPSHOT_COLUMNS), "r", encoding="utf-8") as f:
+            layout = json.load(f)
+        matrix = np.load(os.path.join(snapshot_dir, SNAPSHOT_MATRIX), mmap_mode="r")
+        documents = np.load(os.path.join(snapshot_dir, SNAPSHOT_DOCUMENTS), mmap_mode="r")
+        columns = {
+            column["key"]: np.load(os.path.join(snapshot_dir, column["file"]), mmap_mode="r")
+            for column in layout["columns"]
+        }
+    except FileNotFoundError:
+        print(f"Index snapshot {version} is missing files. Ignoring it.")
+        return None
+    return version, matrix, MappedTable(columns, layout["rows"]), documents
+
+
+def _write_text(path, text):
+    # Written aside and renamed so readers never see half a file
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
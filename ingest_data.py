@@ -1,11 +1,16 @@
 import requests
-from bs4 import BeautifulSoup
+import argparse
+import asyncio
 import json
+import os
 import time
-import re
 import concurrent.futures
+import httpx
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from rate_limit import HostRateLimiter
+from http_cache import HttpCache, CrawlCheckpoint, body_hash, diff_records
+from extract import extract_catalog_rows, extract_details
 
 # --- CONFIGURATION ---
 BASE_URL = "https://www.shl.com/products/product-catalog/"
@@ -23,6 +28,19 @@ HEADERS = {
 # Type=1 is "Individual Test Solutions"
 PARAMS_TYPE = 1 
 PAGE_SIZE = 12
+MAX_START = 1200 # Safety limit
+
+# Async crawler: politeness per host, and how many detail pages may be in flight
+REQUESTS_PER_SECOND = 10
+BURST = 10
+DETAIL_CONCURRENCY = 16
+PARSE_WORKERS = os.cpu_count() or 2
+
+# Re-crawl support: per-URL validators/parsed records, resume log, and change report
+HTTP_CACHE_FILE = "http_cache.sqlite3"
+CHECKPOINT_FILE = "crawl_checkpoint.jsonl"
+CHANGES_FILE = "crawl_changes.json"
+DETAIL_FIELDS = ("description", "duration", "adaptive_support")
 
 def get_session():
     """Creates a request session with built-in retry logic."""
@@ -33,7 +51,7 @@ def get_session():
     session.mount('https://', adapter)
     return session
 
-def scrape_catalog_page(start, session):
+def scrape_catalog_page(start, session, base_url=BASE_URL):
     """Scrapes the main list page to get URLs and basic metadata."""
     params = {
         "start": start,
@@ -44,7 +62,7 @@ def scrape_catalog_page(start, session):
     for attempt in range(3):
         try:
             # Increased timeout to 30 seconds
-            r = session.get(BASE_URL, params=params, headers=HEADERS, timeout=30)
+            r = session.get(base_url, params=params, headers=HEADERS, timeout=30)
             r.raise_for_status()
             break # Success, exit loop
         except requests.exceptions.RequestException as e:
@@ -53,52 +71,11 @@ def scrape_catalog_page(start, session):
             if attempt == 2: # Last attempt failed
                 return []
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    rows = soup.select("tr[data-entity-id]")
-    
-    page_results = []
-    
-    for row in rows:
-        # 1. Name & URL
-        name_tag = row.select_one("td.custom__table-heading__title a")
-        if not name_tag:
-            continue
-            
-        name = name_tag.get_text(strip=True)
-        href = name_tag["href"]
-        url = "https://www.shl.com" + href if href.startswith("/") else href
-
-        # 2. Test Types Mapping
-        type_map = {
-            "A": "Ability & Aptitude",
-            "B": "Biodata & Situational Judgement",
-            "C": "Competencies",
-            "D": "Development & 360",
-            "E": "Assessment Exercises",
-            "K": "Knowledge & Skills",
-            "P": "Personality & Behavior",
-            "S": "Simulations"
-        }
-        
-        found_types = []
-        keys = row.select("span.product-catalogue__key")
-        for k in keys:
-            letter = k.get_text(strip=True)
-            if letter in type_map:
-                found_types.append(type_map[letter])
-        
-        if not found_types:
-            found_types = ["General Assessment"]
-
-        page_results.append({
-            "name": name,
-            "url": url,
-            "test_type": list(set(found_types)),
-            "remote_support": "Yes",
-            "adaptive_support": "No"
-        })
-        
-    return page_results
+    return parse_catalog_page(r.text, base_url)
+
+def parse_catalog_page(html, base_url=BASE_URL):
+    """Extracts name, URL and test types from every row of a catalog page."""
+    return extract_catalog_rows(html, base_url)
 
 def scrape_details(assessment):
     """Visits the individual product page to get Description and Duration."""
@@ -110,37 +87,7 @@ def scrape_details(assessment):
         if r.status_code != 200:
             return assessment
 
-        soup = BeautifulSoup(r.text, "html.parser")
-        text_content = soup.get_text(" ", strip=True)
-
-        # 1. Description
-        desc = ""
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        if meta_desc:
-            desc = meta_desc.get("content", "").strip()
-        
-        if len(desc) < 10:
-            main_div = soup.select_one("div.product-layout__content")
-            if main_div:
-                desc = main_div.get_text(strip=True)[:800]
-            else:
-                desc = text_content[:500]
-
-        assessment['description'] = desc
-
-        # 2. Duration (Regex)
-        duration_match = re.search(r'(?:Time|Duration)[\s\w]*?(\d+)\s*(?:min|minute)', text_content, re.IGNORECASE)
-        if duration_match:
-            assessment['duration'] = int(duration_match.group(1))
-        else:
-            assessment['duration'] = 0
-
-        # 3. Adaptive
-        if "adaptive" in text_content.lower():
-            assessment['adaptive_support'] = "Yes"
-
-        print(f"Scraped details: {assessment['name'][:30]}...")
-        return assessment
+        return parse_details(assessment, r.text)
 
     except Exception as e:
         print(f"Error details for {url}: {e}")
@@ -148,7 +95,14 @@ def scrape_details(assessment):
         assessment['duration'] = 0
         return assessment
 
-def main():
+def parse_details(assessment, html):
+    """Fills description, duration and adaptive support from a product page."""
+    assessment = extract_details(assessment, html)
+    print(f"Scraped details: {assessment['name'][:30]}...")
+    return assessment
+
+def crawl_sequential(base_url=BASE_URL):
+    """Original two-stage crawl: every catalog page first, then details on 8 threads."""
     session = get_session()
     print("--- Stage 1: Collecting List of Assessments ---")
     all_assessments = []
@@ -157,7 +111,7 @@ def main():
     
     while True:
         print(f"Fetching page starting at {start}...")
-        batch = scrape_catalog_page(start, session)
+        batch = scrape_catalog_page(start, session, base_url)
         
         if not batch:
             empty_pages += 1
@@ -168,7 +122,7 @@ def main():
             all_assessments.extend(batch)
         
         start += PAGE_SIZE
-        if start > 1200: break # Safety limit
+        if start > MAX_START: break # Safety limit
         time.sleep(0.5)
 
     # Deduplicate
@@ -192,6 +146,187 @@ def main():
             except Exception as exc:
                 print(f"Generated an exception: {exc}")
 
+    return detailed_results
+
+async def fetch(client, limiter, url, params=None, headers=None):
+    """GET through the shared client under the per-host rate limit. Returns the response or None."""
+    for attempt in range(3):
+        await limiter.acquire(url)
+        try:
+            r = await client.get(url, params=params, headers=headers)
+            if r.status_code not in (429, 500, 502, 503, 504):
+                return r
+            print(f"Attempt {attempt+1}/3 got HTTP {r.status_code} for {url}")
+        except httpx.HTTPError as e:
+            print(f"Attempt {attempt+1}/3 failed for {url}: {e!r}")
+        if attempt < 2:
+            await asyncio.sleep(2 ** attempt) # Back off 1s, 2s
+    return None
+
+def parse_detail_fields(html, assessment):
+    """The fields a product page contributes; cached per URL and merged into the catalog row."""
+    record = parse_details(dict(assessment), html)
+    return {field: record[field] for field in DETAIL_FIELDS}
+
+async def crawl(base_url=BASE_URL, rate=REQUESTS_PER_SECOND, burst=BURST,
+                detail_concurrency=DETAIL_CONCURRENCY, parse_workers=PARSE_WORKERS,
+                cache_file=HTTP_CACHE_FILE, checkpoint_file=CHECKPOINT_FILE, previous_file=None):
+    """
+    Pipelined crawl: detail pages are queued as soon as each catalog page
+    yields URLs, so catalog paging, detail fetches and parsing all overlap.
+    One pooled HTTP client is shared and every host gets a token bucket.
+    Parsing runs in a process pool so it never stalls the event loop.
+
+    With a cache file, re-crawls send conditional requests and reuse the
+    stored record for 304s or identical bodies without parsing. With a
+    checkpoint file, an interrupted run resumes without refetching the
+    detail pages it already finished. Detail fields always come from a
+    product page; the name, URL and types always come from the current
+    catalog row. When a product page cannot be fetched, its last known
+    fields (HTTP cache, else previous_file) are kept instead of blanks.
+    """
+    limiter = HostRateLimiter(rate, burst)
+    queue = asyncio.Queue()
+    detailed_results = []
+    loop = asyncio.get_running_loop()
+    limits = httpx.Limits(max_connections=detail_concurrency + 1, max_keepalive_connections=detail_concurrency + 1)
+    cache = HttpCache(cache_file) if cache_file else None
+    checkpoint = CrawlCheckpoint(checkpoint_file) if checkpoint_file else None
+    stats = {"parsed": 0, "not_modified": 0, "unchanged": 0, "resumed": 0, "failed": 0}
+    if checkpoint and checkpoint.done:
+        print(f"Resuming from checkpoint: {len(checkpoint.done)} detail pages already done.")
+    previous = {}
+    if previous_file and os.path.exists(previous_file):
+        with open(previous_file, "r", encoding="utf-8") as f:
+            previous = {r["url"]: r for r in json.load(f)}
+
+    def last_known_fields(url):
+        """Detail fields from the cached page or the previous crawl output, or None if neither has them"""
+        entry = cache.get(url) if cache else None
+        if entry:
+            return entry["record"]
+        if url in previous:
+            return {field: previous[url][field] for field in DETAIL_FIELDS if field in previous[url]}
+        return None
+
+    async def fetch_parsed(url, params, parse_fn, *parse_args):
+        """Fetches a page (conditionally if cached) and returns its parsed record, or None."""
+        key = str(httpx.URL(url, params=params)) if params else url
+        entry = cache.get(key) if cache else None
+        r = await fetch(client, limiter, url, params, HttpCache.conditional_headers(entry))
+
+        if r is not None and r.status_code == 304 and entry:
+            stats["not_modified"] += 1
+            cache.touch(key)
+            return entry["record"]
+        if r is None or r.status_code != 200:
+            stats["failed"] += 1
+            return None
+
+        digest = body_hash(r.text)
+        if entry and entry["body_hash"] == digest:
+            stats["unchanged"] += 1
+            return entry["record"]
+
+        record = await loop.run_in_executor(parse_pool, parse_fn, r.text, *parse_args)
+        stats["parsed"] += 1
+        if cache:
+            cache.put(key, r.headers.get("etag"), r.headers.get("last-modified"), digest, record)
+        return record
+
+    try:
+        async with httpx.AsyncClient(headers=HEADERS, timeout=30, limits=limits, follow_redirects=True) as client:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+
+                async def catalog_producer():
+                    seen = set()
+                    start = 0
+                    empty_pages = 0
+                    while start <= MAX_START:
+                        print(f"Fetching page starting at {start}...")
+                        params = {"start": start, "type": PARAMS_TYPE}
+                        batch = await fetch_parsed(base_url, params, parse_catalog_page, base_url) or []
+
+                        if not batch:
+                            empty_pages += 1
+                            if empty_pages > 2:
+                                break
+                        else:
+                            empty_pages = 0
+                            for item in batch:
+                                if item['url'] not in seen:
+                                    seen.add(item['url'])
+                                    await queue.put(item)
+                        start += PAGE_SIZE
+                    print(f"\nCatalog done: {len(seen)} unique assessments queued. Minimum required: 377")
+
+                async def detail_worker():
+                    while True:
+                        item = await queue.get()
+                        if item is None:
+                            return
+                        if checkpoint and item['url'] in checkpoint.done:
+                            stats["resumed"] += 1
+                            done = checkpoint.done[item['url']]
+                            item.update({field: done[field] for field in DETAIL_FIELDS if field in done})
+                            detailed_results.append(item)
+                            continue
+
+                        try:
+                            fields = await fetch_parsed(item['url'], None, parse_detail_fields, item)
+                            if fields is None:
+                                raise RuntimeError("fetch failed")
+                            item.update(fields)
+                            # Failures are not checkpointed so a resumed run retries them
+                            if checkpoint:
+                                checkpoint.add(item)
+                        except Exception as e:
+                            print(f"Error details for {item['url']}: {e}")
+                            # Keep the last known details so a failed fetch is not reported as a change
+                            fields = last_known_fields(item['url'])
+                            if fields:
+                                item.update(fields)
+                            else:
+                                item['description'] = "No description available."
+                                item['duration'] = 0
+                        detailed_results.append(item)
+
+                workers = [asyncio.create_task(detail_worker()) for _ in range(detail_concurrency)]
+                await catalog_producer()
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+    except BaseException:
+        # Keep the checkpoint so the next run resumes from here
+        if checkpoint:
+            checkpoint.close()
+        raise
+    finally:
+        if cache:
+            cache.close()
+
+    if checkpoint:
+        checkpoint.finish()
+    print(f"Pages parsed: {stats['parsed']}, not modified (304): {stats['not_modified']}, "
+          f"identical body: {stats['unchanged']}, resumed: {stats['resumed']}, failed: {stats['failed']}")
+    return detailed_results
+
+def report_changes(previous_file, detailed_results, changes_file=CHANGES_FILE):
+    """Writes which assessments were added/changed/removed since the previous crawl output."""
+    previous = []
+    if os.path.exists(previous_file):
+        with open(previous_file, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    changes = diff_records(previous, detailed_results)
+    with open(changes_file, "w", encoding="utf-8") as f:
+        json.dump(changes, f, indent=4)
+
+    print(f"Changes since last crawl: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+          f"{len(changes['removed'])} removed (see {changes_file})")
+    return changes
+
+def save_results(detailed_results, output_file=OUTPUT_FILE):
     # Check count
     count = len(detailed_results)
     print(f"\nTotal Detailed Assessments: {count}")
@@ -200,10 +335,32 @@ def main():
         print("WARNING: Still under 377. Check manual scraping for missing pages.")
     
     # Save
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+    with open(output_file, "w", encoding="utf-8") as f:
         json.dump(detailed_results, f, indent=4)
     
-    print(f"SUCCESS: Data saved to {OUTPUT_FILE}")
+    print(f"SUCCESS: Data saved to {output_file}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the SHL product catalog")
+    parser.add_argument("--base-url", default=BASE_URL, help="Catalog URL (point at a fixture server for benchmarks)")
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--rate", type=float, default=REQUESTS_PER_SECOND, help="Requests per second per host")
+    parser.add_argument("--sequential", action="store_true", help="Use the original non-pipelined crawler")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore the HTTP cache and checkpoint; fetch everything")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.sequential:
+        results = crawl_sequential(args.base_url)
+    elif args.no_cache:
+        results = asyncio.run(crawl(args.base_url, rate=args.rate, burst=max(1.0, args.rate),
+                                    cache_file=None, checkpoint_file=None, previous_file=args.output))
+    else:
+        results = asyncio.run(crawl(args.base_url, rate=args.rate, burst=max(1.0, args.rate),
+                                    previous_file=args.output))
+    print(f"Crawl finished in {time.perf_counter() - start:.1f}s")
+    report_changes(args.output, results)
+    save_results(results, args.output)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
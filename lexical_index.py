@@ -0,0 +1,170 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from metadata_filter import MetadataFilterIndex
+
+# --- CONFIGURATION ---
+DB_DIR = "chroma_db"
+LEXICAL_INDEX_FILE = f"{DB_DIR}/lexical_index.json"
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Name tokens count this many times more than description tokens
+NAME_WEIGHT = 3
+# Reciprocal-rank fusion constant (the usual 60 from the RRF paper)
+RRF_K = 60
+# Queries longer than this are never treated as a product name
+SHORTCUT_MAX_TOKENS = 4
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+[#+]*")
+# How a query reads as a product rather than a role or subject: a version or digit ("Java 8"),
+# a symbol (".NET MVC", "C#") or an upper-case code ("SQL", "OPQ")
+CODE_FORM_PATTERN = re.compile(r"\d|[.#+]|\b[A-Z]{2,}\b")
+# Catalog suffixes that users never type: "Java 8 (New)" is asked for as "Java 8"
+NAME_SUFFIX_PATTERN = re.compile(r"\((?:new)\)", re.IGNORECASE)
+
+
+def tokenize(text):
+    """Lowercased alphanumeric tokens; keeps C#/C++ intact, ".NET" -> "net"."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def name_key(name):
+    return " ".join(tokenize(NAME_SUFFIX_PATTERN.sub(" ", name)))
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over assessment names and descriptions.
+
+    Built once by vector_store.py next to the vector store. Each posting
+    already holds the final BM25 term weight, so a query is a handful of
+    scatter-adds into a score array (well under a millisecond).
+    """
+
+    def __init__(self, postings, metadatas, name_keys):
+        self.postings = {
+            term: (np.asarray(rows, dtype=np.int32), np.asarray(weights, dtype=np.float32))
+            for term, (rows, weights) in postings.items()
+        }
+        self.metadatas = metadatas
+        self.filters = MetadataFilterIndex(metadatas)
+        self.name_keys = name_keys
+        self.name_tokens = [set(key.split()) for key in name_keys]
+        self.exact_names = {}
+        self.name_prefixes = set()
+        for row, key in enumerate(name_keys):
+            self.exact_names.setdefault(key, []).append(row)
+            tokens = key.split()
+            for i in range(1, min(len(tokens), SHORTCUT_MAX_TOKENS) + 1):
+                self.name_prefixes.add(" ".join(tokens[:i]))
+
+    @classmethod
+    def build(cls, records, metadatas):
+        """records are shl_assessments.json items, metadatas the matching vector store metadata"""
+        names = [name_key(r["name"]) for r in records]
+        term_counts = []
+        for key, record in zip(names, records):
+            counts = Counter(tokenize(record.get("description", "")))
+            for token in key.split():
+                counts[token] += NAME_WEIGHT
+            term_counts.append(counts)
+
+        lengths = [sum(c.values()) for c in term_counts]
+        avg_length = sum(lengths) / max(len(lengths), 1)
+        doc_freq = Counter(term for counts in term_counts for term in counts)
+
+        postings = {}
+        n = len(records)
+        for row, (counts, length) in enumerate(zip(term_counts, lengths)):
+            norm = K1 * (1 - B + B * length / avg_length)
+            for term, tf in counts.items():
+                idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                rows, weights = postings.setdefault(term, ([], []))
+                rows.append(row)
+                weights.append(round(idf * tf * (K1 + 1) / (tf + norm), 6))
+
+        return cls(postings, metadatas, names)
+
+    def save(self, path=LEXICAL_INDEX_FILE):
+        payload = {
+            "metadatas": self.metadatas,
+            "name_keys": self.name_keys,
+            "postings": {term: [rows.tolist(), weights.tolist()] for term, (rows, weights) in self.postings.items()},
+        }
+        # Written aside and renamed so a running engine never reads half a file
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=LEXICAL_INDEX_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        return cls(payload["postings"], payload["metadatas"], payload["name_keys"])
+
+    def __len__(self):
+        return len(self.metadatas)
+
+    def search(self, query, k, filters=None):
+        """Returns (row indices, BM25 scores) of the top-k matching rows, best first"""
+        scores = np.zeros(len(self.metadatas), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        mask = self.filters.mask(filters)
+        if mask is not None:
+            scores[~mask] = 0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return matched, scores[matched]
+
+    def name_matches(self, query, k=10, filters=None):
+        """
+        Rows the query names outright, or None when it does not read as a
+        product name. Either the whole query is a product name written in a
+        code form ("Java 8", ".NET MVC", "SQL"), or it is a product code
+        ("OPQ") that starts at least one name, in which case every product
+        carrying it matches. Role and subject words ("Sales", "Marketing",
+        "Human Resources") are names too but need the LLM's judgement.
+        """
+        tokens = tokenize(query)
+        if not tokens or len(tokens) > SHORTCUT_MAX_TOKENS or not CODE_FORM_PATTERN.search(query):
+            return None
+
+        key = " ".join(tokens)
+        exact = self.exact_names.get(key)
+        if exact:
+            mask = self.filters.mask(filters)
+            exact = [row for row in exact if mask is None or mask[row]]
+            return exact[:k] or None
+
+        code = query.strip()
+        if len(tokens) > 1 or not code.isupper() or key not in self.name_prefixes:
+            return None
+        rows, _ = self.search(key, len(self.metadatas), filters)
+        hits = [int(row) for row in rows if key in self.name_tokens[row]]
+        return hits[:k] or None
+
+    def metadata(self, row):
+        return self.metadatas[row]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuses several best-first lists of keys into one: score = sum of 1 / (k + rank)"""
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    # sorted() is stable, so ties keep the order of the first ranking
+    return sorted(scores, key=lambda key: -scores[key])
@@ -0,0 +1,210 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+from collections import Counter
+
+import httpx
+
+from stage_timing import STAGES, StageRecorder, add_listener, latency_summary, remove_listener
+
+# --- CONFIGURATION ---
+SAMPLE_QUERIES = [
+    "I am hiring for Java developers who can also collaborate effectively with my business teams.",
+    "Looking to hire mid-level professionals who are proficient in Python, SQL and Java Script.",
+    "I am hiring for an analyst and want to screen applications using Cognitive and personality tests",
+    "I need a sales manager who can drive revenue and manage a large team.",
+    "We need a customer service representative who remains calm under pressure.",
+]
+# Answered by the lexical shortcut (no embedding, no LLM)
+NAMED_QUERIES = ["Java 8", ".NET MVC", "OPQ", "SQL Server", "SQL"]
+# Share of unique / repeated / product-name queries per mix
+QUERY_MIXES = {
+    "unique": (1.0, 0.0, 0.0),    # every request runs the full pipeline (in-process: response cache off)
+    "repeat": (0.0, 1.0, 0.0),    # the response cache answers after the first round
+    "named": (0.0, 0.0, 1.0),     # lexical shortcut only
+    "mixed": (0.6, 0.25, 0.15),
+}
+
+
+def build_queries(total, mix):
+    """Deterministic query list for a mix, interleaved so every phase of the run sees the same blend"""
+    unique_share, repeat_share, _ = QUERY_MIXES[mix]
+    queries = []
+    for i in range(total):
+        slot = (i * 0.618034) % 1.0  # low-discrepancy spread of the shares
+        if slot < unique_share:
+            # Distinct text, but close enough for the semantic cache to match: see the cache-hit share
+            queries.append(f"{SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)]} (request {i})")
+        elif slot < unique_share + repeat_share:
+            queries.append(SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)])
+        else:
+            queries.append(NAMED_QUERIES[i % len(NAMED_QUERIES)])
+    return queries
+
+
+async def stream_request(client, body, start):
+    """POST /recommend/stream; returns (status, final source, seconds until the first NDJSON line)"""
+    first = source = None
+    async with client.stream("POST", "/recommend/stream", json=body) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            if first is None:
+                first = time.perf_counter() - start
+            event = json.loads(line)
+            source = event.get("source", event["event"])
+    return response.status_code, source, first
+
+
+async def run_load(client, queries, concurrency, selection=None, stream=False):
+    latencies = []
+    first_results = []
+    errors = 0
+    sources = Counter()
+    limiter = asyncio.Semaphore(concurrency)
+
+    async def one_request(query):
+        nonlocal errors
+        async with limiter:
+            start = time.perf_counter()
+            try:
+                body = {"query": query} if selection is None else {"query": query, "selection": selection}
+                if stream:
+                    status, source, first = await stream_request(client, body, start)
+                    if first is not None:
+                        first_results.append(first)
+                else:
+                    response = await client.post("/recommend", json=body)
+                    status, source = response.status_code, response.headers.get("X-Recommendation-Source")
+                if status != 200:
+                    errors += 1
+                sources[source or "unknown"] += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(q) for q in queries))
+    elapsed = time.perf_counter() - start
+
+    overall = latency_summary(latencies)
+    overall.update({
+        "requests": len(queries),
+        "errors": errors,
+        "wall_s": elapsed,
+        "requests_per_s": len(queries) / elapsed,
+        "sources": dict(sources),
+        "cache_hit_share": sources["cache"] / len(queries),
+    })
+    if first_results:
+        overall["first_result"] = latency_summary(first_results)
+    return overall
+
+
+def report(overall, stages, concurrency):
+    print(f"\n--- LOAD TEST ({overall['requests']} requests, concurrency {concurrency}) ---")
+    print(f"Wall time:   {overall['wall_s']:.2f}s")
+    print(f"Throughput:  {overall['requests_per_s']:.1f} req/s")
+    print(f"Errors:      {overall['errors']}")
+    print(f"Sources:     {', '.join(f'{k}={v}' for k, v in sorted(overall['sources'].items()))}")
+    print(f"Cache hits:  {overall['cache_hit_share']:.1%} of requests")
+    print(f"\n{'stage':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>8}")
+    rows = [("request", overall)]
+    if "first_result" in overall:
+        rows.append(("first result", overall["first_result"]))
+    rows += [(stage, stages[stage]) for stage in STAGES if stage in stages]
+    for name, row in rows:
+        print(f"{name:<14} {row['count']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+              f"{row['count'] / overall['wall_s']:>8.1f}")
+    if not stages:
+        print("(per-stage timings are only available for the in-process app)")
+    elif "first_result" in overall:
+        print("(the in-process transport buffers each response; use --url for a real time to first result)")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for /recommend with per-stage timings")
+    parser.add_argument("--url", help="Base URL of a running server (default: in-process app with fake LLM)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--mix", choices=sorted(QUERY_MIXES), default="unique")
+    parser.add_argument("--repeat-queries", action="store_true", help="Shorthand for --mix repeat")
+    parser.add_argument("--selection", choices=["llm", "local", "auto"], help="Selection mode sent with every request")
+    parser.add_argument("--stream", action="store_true",
+                        help="Use /recommend/stream and report time to the first (preliminary) result")
+    parser.add_argument("--llm-latency", type=float, help="Fake LLM latency in seconds (in-process only)")
+    parser.add_argument("--llm-jitter", type=float, help="Fake LLM latency jitter in seconds")
+    parser.add_argument("--llm-failure-rate", type=float, help="Share of fake LLM calls that fail")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+    mix = "repeat" if args.repeat_queries else args.mix
+    queries = build_queries(args.requests, mix)
+
+    stages = {}
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+            overall = await run_load(client, queries, args.concurrency, args.selection, args.stream)
+    else:
+        # Must be set before main.py builds the engine (and configures logging: no access line per request)
+        os.environ.setdefault("LLM_BACKEND", "fake")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        if mix == "unique":
+            # The unique queries are near-duplicates of five sentences, which the semantic
+            # response cache would answer; turn it off so every request runs the pipeline
+            os.environ.setdefault("RESPONSE_CACHE_SIZE", "0")
+        for flag, env in (("llm_latency", "FAKE_LLM_LATENCY"), ("llm_jitter", "FAKE_LLM_JITTER"),
+                          ("llm_failure_rate", "FAKE_LLM_FAILURE_RATE")):
+            if getattr(args, flag) is not None:
+                os.environ[env] = str(getattr(args, flag))
+        import main as api
+
+        recorder = StageRecorder()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://test", timeout=120)
+        # ASGITransport does not run startup events, so drive the app's lifespan here
+        async with api.app.router.lifespan_context(api.app), client:
+            await asyncio.to_thread(api.engine.ready.wait, 300)
+            add_listener(recorder)
+            try:
+                overall = await run_load(client, queries, args.concurrency, args.selection, args.stream)
+            finally:
+                remove_listener(recorder)
+        stages = recorder.summary()
+
+    report(overall, stages, args.concurrency)
+
+    if args.output:
+        results = {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "config": {
+                "target": args.url or "in-process",
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "mix": mix,
+                "selection": args.selection,
+                "stream": args.stream,
+                "llm_backend": None if args.url else os.environ.get("LLM_BACKEND"),
+                "fake_llm_latency": None if args.url else float(os.getenv("FAKE_LLM_LATENCY", "1.0")),
+                "fake_llm_failure_rate": None if args.url else float(os.getenv("FAKE_LLM_FAILURE_RATE", "0.0")),
+                "response_cache_size": None if args.url else int(os.getenv("RESPONSE_CACHE_SIZE", "512")),
+            },
+            "overall": overall,
+            "stages": stages,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to '{args.output}'.")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,16 +1,90 @@
-from fastapi import FastAPI, HTTPException
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Literal, Optional
 import uvicorn
 from rag_engine import RecommendationEngine
+from metadata_filter import make_filters
+import catalog_records
+import telemetry
 
-# Initialize App & Engine
-app = FastAPI(title="SHL Recommendation API")
-engine = RecommendationEngine()
+MAX_BATCH_SIZE = 200
+engine = None
+
+telemetry.configure_logging()
+log = logging.getLogger("api")
+
+@asynccontextmanager
+async def lifespan(app):
+    # The engine loads its index snapshot in milliseconds; the embedding model and
+    # LLM client warm up in the background while the server already accepts connections
+    global engine
+    engine = RecommendationEngine()
+    telemetry.set_cache_stats_source(engine.cache_stats)
+    engine.start_warm_up()
+    yield
+
+class RequestContextMiddleware:
+    """
+    Plain ASGI middleware: assigns each request an ID (X-Request-ID is kept if
+    the caller sent one), echoes it in the response, writes one structured
+    access-log line and records the request latency.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        incoming = dict(scope["headers"]).get(b"x-request-id")
+        request_id = telemetry.new_request_id(incoming.decode("latin-1") if incoming else None)
+        token = telemetry.request_id.set(request_id)
+        start = time.perf_counter()
+        outcome = {"status": 500, "source": None}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                outcome["status"] = message["status"]
+                headers = list(message.get("headers", []))
+                outcome["source"] = dict(headers).get(b"x-recommendation-source", b"").decode() or None
+                message["headers"] = headers + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            seconds = time.perf_counter() - start
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            telemetry.record_request(scope["method"], path, outcome["status"], seconds)
+            log.info("request", extra={"fields": {
+                "method": scope["method"], "path": path, "status": outcome["status"],
+                "duration_ms": round(seconds * 1000, 2), "source": outcome["source"]
+            }})
+            telemetry.request_id.reset(token)
+
+# Initialize App (the engine is created on startup)
+app = FastAPI(title="SHL Recommendation API", lifespan=lifespan)
+app.add_middleware(RequestContextMiddleware)
 
 # --- DATA MODELS ---
-class QueryRequest(BaseModel):
+class FilterFields(BaseModel):
+    # Optional hard constraints, applied before retrieval
+    max_duration: Optional[int] = Field(None, ge=0, description="Maximum duration in minutes (assessments with no stated duration are kept)")
+    test_types: Optional[List[str]] = Field(None, description="Only these test types, e.g. [\"Personality & Behavior\"]")
+    remote_support: Optional[bool] = Field(None, description="Require (true) or exclude (false) remote testing support")
+    adaptive_support: Optional[bool] = Field(None, description="Require (true) or exclude (false) adaptive/IRT support")
+
+class QueryRequest(FilterFields):
     query: str = Field(..., description="Job description or search query")
+    latency_budget_ms: Optional[int] = Field(None, ge=0, description="Return the vector fallback if the LLM has not answered within this budget (0 = no limit)")
+    selection: Optional[Literal["llm", "local", "auto"]] = Field(None, description="Who picks the final 5-10: the LLM, the local MMR reranker, or local only when the LLM is saturated (default: server's SELECTION_MODE)")
 
 class AssessmentItem(BaseModel):
     url: str
@@ -24,16 +98,134 @@ class AssessmentItem(BaseModel):
 class RecommendationResponse(BaseModel):
     recommended_assessments: List[AssessmentItem]
 
+class BatchQueryRequest(FilterFields):
+    queries: List[str] = Field(..., description="Job descriptions or search queries")
+    latency_budget_ms: Optional[int] = Field(None, ge=0, description="Latency budget for the whole batch (0 = no limit)")
+    selection: Optional[Literal["llm", "local", "auto"]] = Field(None, description="Selection mode for every query in the batch")
+
+class BatchResultItem(BaseModel):
+    query: str
+    recommended_assessments: List[AssessmentItem]
+    source: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[BatchResultItem]
+
+class FragmentResponse(Response):
+    """
+    JSON body already assembled from the catalog's pre-serialized fragments
+    (catalog_records.render). Returned as-is: the records were built to the
+    response model's shape once at load time, so there is nothing to re-validate.
+    """
+    media_type = "application/json"
+
+def request_filters(request):
+    filters = make_filters(
+        max_duration=request.max_duration,
+        test_types=request.test_types,
+        remote_support=request.remote_support,
+        adaptive_support=request.adaptive_support
+    )
+    try:
+        engine.validate_filters(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return filters
+
 # --- ENDPOINTS ---
 @app.get("/health")
 def health_check():
+    # Liveness: the process is up and serving HTTP
     return {"status": "healthy"}
 
-@app.post("/recommend", response_model=RecommendationResponse)
-def recommend_assessments(request: QueryRequest):
+@app.get("/ready")
+def readiness_check():
+    # Readiness: only route traffic here once the model is warm
+    if engine is None or not engine.ready.is_set():
+        error = engine.warm_up_error if engine is not None else None
+        return JSONResponse(status_code=503, content={"status": "warming_up" if error is None else "failed", "error": error})
+    return {"status": "ready", "index_version": engine.index_version}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return engine.cache_stats()
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus scrape target: stage/request latency histograms, result sources, LLM errors, cache hits
+    if not telemetry.metrics_enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    body, content_type = telemetry.render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.post("/recommend", response_model=RecommendationResponse, response_class=FragmentResponse)
+async def recommend_assessments(request: QueryRequest):
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
-    return engine.search_and_recommend(request.query)
+    filters = request_filters(request)
+    result = await engine.asearch_and_recommend(
+        request.query, latency_budget_ms=request.latency_budget_ms, filters=filters, selection=request.selection
+    )
+    # Body stays in the spec'd shape; the serving path goes in a header for SLO monitoring
+    headers = {"X-Recommendation-Source": result["source"]}
+    if "tokens" in result:
+        # Provider-reported prompt tokens when available, else the engine's estimate
+        tokens = result["tokens"]
+        headers["X-Prompt-Tokens"] = str(tokens["input"] if tokens["input"] is not None else tokens["prompt_estimate"])
+    telemetry.record_result(result["source"])
+    return FragmentResponse(catalog_records.render(result["recommended_assessments"]), headers=headers)
+
+@app.post("/recommend/stream")
+async def recommend_assessments_stream(request: QueryRequest):
+    """
+    NDJSON stream: a "preliminary" line with the retrieval-ranked list as soon as
+    retrieval is done, then a "final" line with the LLM's selection ("fallback": true
+    when the LLM failed or ran out of budget). Cached and product-name answers
+    arrive as a single final line. A failure mid-stream is sent as an "error" line.
+    """
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+    filters = request_filters(request)
+    start = time.perf_counter()
+
+    async def events():
+        first = True
+        try:
+            async for event, result in engine.astream_recommendations(
+                request.query, latency_budget_ms=request.latency_budget_ms, filters=filters,
+                selection=request.selection
+            ):
+                elapsed = time.perf_counter() - start
+                if first:
+                    telemetry.record_first_result(event, elapsed)
+                    first = False
+                fields = {"event": event, "source": result["source"], "elapsed_ms": round(elapsed * 1000, 1)}
+                if event == "final":
+                    fields["fallback"] = result["source"].startswith("fallback")
+                    telemetry.record_result(result["source"])
+                yield catalog_records.render(result["recommended_assessments"], **fields) + b"\n"
+        except Exception as e:
+            log.exception("Streaming recommendation failed")
+            telemetry.record_result(None)
+            yield json.dumps({"event": "error", "detail": str(e)}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/recommend/batch", response_model=BatchRecommendationResponse, response_class=FragmentResponse)
+async def recommend_assessments_batch(request: BatchQueryRequest):
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="Queries cannot be empty")
+    if len(request.queries) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} queries per batch")
+    # Per-query failures are reported in each item's "error" field
+    filters = request_filters(request)
+    results = await engine.asearch_and_recommend_many(
+        request.queries, latency_budget_ms=request.latency_budget_ms, filters=filters, selection=request.selection
+    )
+    for item in results:
+        telemetry.record_result(item["source"])
+    return FragmentResponse(catalog_records.render_batch(results))
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
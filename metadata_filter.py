@@ -0,0 +1,116 @@
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# --- CONFIGURATION ---
+# Cached masks / row sets for the most recent distinct filter combinations
+CACHE_SIZE = 256
+
+
+class QueryFilters(NamedTuple):
+    """
+    Hard constraints on recommended assessments. None = no constraint.
+    Hashable, so it doubles as a cache key.
+    """
+    max_duration: Optional[int] = None
+    test_types: Optional[Tuple[str, ...]] = None  # any of these types
+    remote_support: Optional[bool] = None
+    adaptive_support: Optional[bool] = None
+
+
+def make_filters(max_duration=None, test_types=None, remote_support=None, adaptive_support=None):
+    """QueryFilters from request fields, or None when nothing is constrained"""
+    filters = QueryFilters(
+        max_duration=max_duration,
+        test_types=tuple(sorted(set(test_types))) if test_types else None,
+        remote_support=remote_support,
+        adaptive_support=adaptive_support,
+    )
+    return filters if any(value is not None for value in filters) else None
+
+
+class MetadataFilterIndex:
+    """
+    Precomputed bitmaps over the metadata stored by vector_store.py, aligned
+    with the rows of one index (NumPy, Chroma or lexical).
+
+    One boolean array per test type and per Yes/No flag, plus durations
+    sorted once so a max_duration cut is a binary search. A filter is the
+    AND of a few arrays and yields the sorted row ids to score.
+    """
+
+    def __init__(self, metadatas):
+        self.size = len(metadatas)
+
+        self.type_masks = {}
+        for row, meta in enumerate(metadatas):
+            for test_type in str(meta.get('test_type', '')).split(", "):
+                if test_type:
+                    self.type_masks.setdefault(test_type, np.zeros(self.size, dtype=bool))[row] = True
+
+        self.remote = np.array([meta.get('remote_support') == "Yes" for meta in metadatas], dtype=bool)
+        self.adaptive = np.array([meta.get('adaptive_support') == "Yes" for meta in metadatas], dtype=bool)
+
+        durations = np.array([int(meta.get('duration') or 0) for meta in metadatas], dtype=np.int32)
+        # 0 means the product page did not state a duration; those rows are kept by max_duration
+        self.unknown_duration = durations == 0
+        self.duration_order = np.argsort(durations, kind="stable")
+        self.sorted_durations = durations[self.duration_order]
+
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def known_types(self):
+        return sorted(self.type_masks)
+
+    def validate(self, filters):
+        """Raises ValueError for test types the catalog does not contain"""
+        if filters is not None and filters.test_types:
+            unknown = [t for t in filters.test_types if t not in self.type_masks]
+            if unknown:
+                raise ValueError(f"Unknown test type(s) {unknown}. Known types: {self.known_types()}")
+
+    def mask(self, filters):
+        """Boolean array of rows that satisfy the filters (None = every row)"""
+        if filters is None:
+            return None
+        return self._lookup(filters)[0]
+
+    def rows(self, filters):
+        """Sorted row ids that satisfy the filters (None = every row)"""
+        if filters is None:
+            return None
+        return self._lookup(filters)[1]
+
+    def _lookup(self, filters):
+        with self._lock:
+            entry = self._cache.get(filters)
+        if entry is None:
+            mask = self._compute_mask(filters)
+            entry = (mask, np.flatnonzero(mask).astype(np.int32))
+            with self._lock:
+                if len(self._cache) >= CACHE_SIZE:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[filters] = entry
+        return entry
+
+    def _compute_mask(self, filters):
+        self.validate(filters)
+        mask = np.ones(self.size, dtype=bool)
+
+        if filters.max_duration is not None:
+            within = np.zeros(self.size, dtype=bool)
+            cut = np.searchsorted(self.sorted_durations, filters.max_duration, side="right")
+            within[self.duration_order[:cut]] = True
+            mask &= within | self.unknown_duration
+        if filters.test_types:
+            any_type = np.zeros(self.size, dtype=bool)
+            for test_type in filters.test_types:
+                any_type |= self.type_masks[test_type]
+            mask &= any_type
+        if filters.remote_support is not None:
+            mask &= self.remote == filters.remote_support
+        if filters.adaptive_support is not None:
+            mask &= self.adaptive == filters.adaptive_support
+        return mask
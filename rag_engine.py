@@ -1,142 +1,1060 @@
 import os
+import re
 import json
+import math
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from typing import NamedTuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.documents import Document
+from vector_index import NumpyIndex
+from lexical_index import LexicalIndex, LEXICAL_INDEX_FILE, reciprocal_rank_fusion, tokenize
+from metadata_filter import MetadataFilterIndex
+from embedding_cache import CachedEmbeddings, normalize_text
+from response_cache import SemanticResponseCache
+from singleflight import SingleFlight
+from catalog_records import AssessmentCatalog
+from index_snapshot import read_index_version, read_embedding_backend
+from embedding_backends import EMBEDDING_BACKEND, LazyEmbeddings, embedding_namespace
+from stage_timing import span
+import reranker
+import telemetry
 
 # Load API Key from .env
 load_dotenv()
 
+log = logging.getLogger("rag_engine")
+
+# Chroma, Gemini, the embedding model and langchain_core's prompt/model modules
+# (which pull in transformers when it is installed) are imported lazily: together
+# they take seconds to import, and the API should bind and answer probes first.
+
 # --- CONFIGURATION ---
 DB_DIR = "chroma_db"
 # Switch to Flash model (Faster & more reliable for free tier)
 LLM_MODEL = "gemini-2.5-flash-lite"
+# "gemini" for production, "fake" for a local stand-in (see fake_llm.py)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+# Max concurrent LLM calls in the async path (protects the Gemini quota)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "16"))
+# Threads used for embedding + retrieval in the async path
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+# "numpy" = exact in-process search, "chroma" = Chroma's HNSW segment
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "numpy")
+# Query embeddings are cached in memory; set a file path to persist them across restarts
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+EMBEDDING_CACHE_FILE = os.getenv("EMBEDDING_CACHE_FILE")  # e.g. "embedding_cache.sqlite3"
+# Final responses are reused for exact and near-duplicate queries (size 0 disables)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.9"))
+# How often (seconds) to check whether the vector store has been rebuilt
+INDEX_CHECK_INTERVAL = 5.0
+# Server-wide latency budget per request in ms (0 = wait for the LLM however long it takes).
+# Once the budget is spent the vector fallback is returned immediately.
+LATENCY_BUDGET_MS = float(os.getenv("LATENCY_BUDGET_MS", "0"))
+# Fire a second (hedged) LLM request once the first has been outstanding longer
+# than this percentile of recent LLM latencies (0 = no hedging)
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+HEDGE_MIN_SAMPLES = 20
+# Queries that name a product ("Java 8", "OPQ") are answered from the BM25 index without the LLM
+LEXICAL_SHORTCUT = os.getenv("LEXICAL_SHORTCUT", "1") == "1"
+# Fuse BM25 and vector rankings (reciprocal-rank fusion) when picking the LLM's candidates
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") == "1"
+# Candidates sent to the LLM: at most MAX_CANDIDATES, fewer when the similarity scores
+# drop more than CANDIDATE_SCORE_GAP (cosine) below the best match, never below MIN_CANDIDATES
+MAX_CANDIDATES = 15
+MIN_CANDIDATES = int(os.getenv("MIN_CANDIDATES", "8"))
+ADAPTIVE_CANDIDATES = os.getenv("ADAPTIVE_CANDIDATES", "1") == "1"
+CANDIDATE_SCORE_GAP = float(os.getenv("CANDIDATE_SCORE_GAP", "0.12"))
+# Estimated prompt tokens per request; candidates (then descriptions) are trimmed to fit
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "800"))
+DESCRIPTION_CHARS = 80
+# Who picks the final 5-10: "llm" (Gemini), "local" (reranker.py: MMR with per-type quotas,
+# milliseconds, no network) or "auto" (local while every LLM slot is taken, async path only).
+# Requests can override it; LLM failures fall back to the local reranker either way.
+SELECTION_MODE = os.getenv("SELECTION_MODE", "llm")
+SELECTION_MODES = ("llm", "local", "auto")
+# Concurrent requests for the same normalized query (and options) share one pipeline run
+COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "1") == "1"
+
+# Same letters as the SHL catalog's test type key (extract.TYPE_MAP)
+TYPE_CODES = {
+    "Ability & Aptitude": "A",
+    "Biodata & Situational Judgement": "B",
+    "Competencies": "C",
+    "Development & 360": "D",
+    "Assessment Exercises": "E",
+    "Knowledge & Skills": "K",
+    "Personality & Behavior": "P",
+    "Simulations": "S"
+}
+NEW_SUFFIX = re.compile(r"\s*\(New\)\s*$")
+NEW_PREFIX = re.compile(r"^\s*\(New\)")
+
+SELECTION_PROMPT = """You are an expert HR recruitment consultant. Pick the SHL assessments that best fit this hiring need.
+
+QUERY: "{query}"
+
+CANDIDATES ({count}), one per line as ID|name|types|description. Types: {types}. "=N" means same description as ID N.
+{candidates}
+
+RULES:
+1. Relevance: must match the job role.
+2. Balance: if the query implies a role (e.g. manager, developer), mix K (hard skills), P (soft skills/culture fit) and A (cognitive fit).
+3. Select 5 to 10 IDs.
+
+Return ONLY JSON: {{"selected_ids": [0, 2, 5]}}"""
+
+def estimate_tokens(text):
+    """Rough LLM token count (~4 characters per token); enough to enforce a budget"""
+    return math.ceil(len(text) / 4)
+
+
+def candidate_description(doc, name, max_chars):
+    """Description from the embedded text, without the product name it usually repeats, cut at a word"""
+    text = doc.page_content
+    description = text.split("Description:", 1)[1] if "Description:" in text else doc.metadata.get('description', '')
+    description = " ".join(description.split())
+    if description.lower().startswith(name.lower()):
+        description = NEW_PREFIX.sub("", description[len(name):]).lstrip(" :-")
+    if len(description) <= max_chars:
+        return description
+    cut = description[:max_chars].rsplit(" ", 1)[0]
+    return cut.rstrip(",;:.") + "..." if cut else ""
+
+
+class IndexState(NamedTuple):
+    """
+    One loaded index version. A request reads engine.state once and passes it
+    through every stage, so a reload swapping in a new state mid-request never
+    mixes row ids, metadata and records from two versions.
+    """
+    version: object
+    db: object              # Chroma client, or None when serving from the snapshot
+    index: object           # NumpyIndex, or None with the chroma backend
+    chroma_filters: object  # (MetadataFilterIndex, row URLs) for the chroma backend, else None
+    lexical: object         # LexicalIndex, or None
+    catalog: AssessmentCatalog
+
 
 class RecommendationEngine:
-    def __init__(self):
-        # 1. Initialize Retrieval (CPU-forced)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'}
+    def __init__(self, backend=RETRIEVAL_BACKEND, llm=None):
+        """
+        Cheap by design: loads the index snapshot and lexical index (milliseconds)
+        but not the embedding model or the LLM client. Call warm_up() (or
+        start_warm_up() for a background thread) before taking traffic; until
+        then the first request pays for loading them.
+        """
+        if backend not in ("numpy", "chroma"):
+            raise ValueError(f"Unknown retrieval backend: {backend}")
+        self.backend = backend
+
+        # 1. Initialize Retrieval (CPU-only backend shared with vector_store.py, repeated texts served from cache)
+        self._embedder = LazyEmbeddings(EMBEDDING_BACKEND)
+        self.embeddings = CachedEmbeddings(
+            self._embedder,
+            max_size=EMBEDDING_CACHE_SIZE,
+            path=EMBEDDING_CACHE_FILE,
+            namespace=embedding_namespace(EMBEDDING_BACKEND)
         )
-        self.db = Chroma(persist_directory=DB_DIR, embedding_function=self.embeddings)
+        if read_embedding_backend() != EMBEDDING_BACKEND:
+            log.warning(f"The store was embedded with '{read_embedding_backend()}' but queries use "
+                        f"'{EMBEDDING_BACKEND}'. Rebuild with vector_store.py --full for exact parity.")
+
+        # The whole catalog lives in memory; per-query search is then a single matmul.
+        # Every assessment is pre-hydrated into its API record and JSON fragment.
+        self.state = self._load_state(read_index_version())
+
+        self.response_cache = SemanticResponseCache(
+            max_size=RESPONSE_CACHE_SIZE,
+            ttl_seconds=RESPONSE_CACHE_TTL,
+            threshold=RESPONSE_CACHE_THRESHOLD
+        )
+        self._last_index_check = time.monotonic()
+        self._reload_lock = threading.Lock()
         
-        # 2. Initialize LLM (Gemini)
-        if not os.getenv("GOOGLE_API_KEY"):
+        # 2. LLM (Gemini, or an injected/fake model for load tests), created on first use
+        if llm is None and LLM_BACKEND != "fake" and not os.getenv("GOOGLE_API_KEY"):
             raise ValueError("GOOGLE_API_KEY not found in .env file")
-            
-        self.llm = ChatGoogleGenerativeAI(
+        self._llm = llm
+        self._llm_lock = threading.Lock()
+        # Prompt template, chain and parser are built once, on first use
+        self._chain = None
+        self._output_parser = None
+        self._chain_lock = threading.Lock()
+
+        # 3. Async plumbing: embedding/retrieval run off the event loop,
+        # LLM calls are capped to protect the Gemini quota
+        self._executor = ThreadPoolExecutor(max_workers=EMBED_WORKERS, thread_name_prefix="embed")
+        self._llm_semaphore = None
+        # Recent LLM latencies (seconds), used to pick the hedging delay
+        self._llm_latencies = deque(maxlen=256)
+        self._llm_in_flight = 0
+        # Identical in-flight queries attach to the first one's execution
+        self._flights = SingleFlight()
+
+        # Set once the embedding model and LLM client are loaded (see /ready)
+        self.ready = threading.Event()
+        self.warm_up_error = None
+
+    @property
+    def index_version(self):
+        return self.state.version
+
+    @property
+    def db(self):
+        return self.state.db
+
+    @property
+    def index(self):
+        return self.state.index
+
+    @property
+    def lexical(self):
+        return self.state.lexical
+
+    @property
+    def catalog(self):
+        return self.state.catalog
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self._create_llm()
+        return self._llm
+
+    def _create_llm(self):
+        if LLM_BACKEND == "fake":
+            from fake_llm import FakeLLM
+            return FakeLLM.from_env()
+
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
             model=LLM_MODEL, 
             temperature=0.2,
             max_retries=2, # Auto-retry if 503 error occurs
             convert_system_message_to_human=True
         )
 
-    def search_and_recommend(self, user_query):
+    def warm_up(self):
+        """Loads the embedding model (plus one forward pass) and the LLM client, then marks the engine ready"""
+        try:
+            start = time.perf_counter()
+            model_seconds = self._embedder.warm_up()
+            self.llm  # first access creates the client (and imports its SDK)
+            self._selection_chain()
+            self.ready.set()
+            log.info("Engine warmed up", extra={"fields": {
+                "seconds": round(time.perf_counter() - start, 3), "model_seconds": round(model_seconds, 3)}})
+        except Exception as e:
+            self.warm_up_error = str(e)
+            log.error(f"Warm-up failed ({e}). Engine stays not ready.")
+
+    def start_warm_up(self):
+        thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def search_and_recommend(self, user_query, filters=None, selection=None):
         """
         Full Pipeline: Query -> Retrieve 15 -> LLM Selects Best 5-10 -> Format JSON
+        filters (metadata_filter.QueryFilters) restrict the catalog before retrieval.
+        selection overrides SELECTION_MODE for this request.
         """
-        print(f"Processing Query: {user_query}")
-        
-        # Step A: Retrieval
-        docs = self.db.similarity_search(user_query, k=15)
-        
-        # Create mapping
-        candidates = []
-        doc_map = {}
-        
-        for idx, doc in enumerate(docs):
-            doc_map[idx] = doc.metadata
-            candidates.append(
-                f"ID {idx}: Name: {doc.metadata['name']} | Type: {doc.metadata['test_type']} | Desc: {doc.metadata.get('description', '')[:200]}..."
+        if not COALESCE_REQUESTS:
+            return self._search_and_recommend(user_query, filters, selection)
+        key = (normalize_text(user_query), filters, selection)
+        result, shared = self._flights.do(key, self._search_and_recommend, user_query, filters, selection)
+        return self._coalesced(result) if shared else result
+
+    def _search_and_recommend(self, user_query, filters=None, selection=None):
+        log.debug("Processing query", extra={"fields": {"query": user_query}})
+
+        # Step A + B: Response cache, then retrieval
+        state, query_vector, cached, docs = self._prepare(user_query, filters, selection)
+        if cached is not None:
+            return cached
+
+        return self._complete(state, user_query, query_vector, docs, filters, selection)
+
+    async def asearch_and_recommend(self, user_query, latency_budget_ms=None, filters=None, fallback=True,
+                                    selection=None):
+        """
+        Same pipeline as search_and_recommend without blocking the event loop:
+        embedding and retrieval run in a bounded executor and the LLM is awaited
+        via ainvoke under a concurrency limit.
+
+        latency_budget_ms overrides LATENCY_BUDGET_MS for this request. The
+        result's "source" says which path produced it: "cache", "llm",
+        "llm_hedged", "local", "fallback_error" or "fallback_deadline".
+        With fallback=False an LLM failure is raised instead (callers that retry, e.g. on 429).
+        Concurrent calls with the same normalized query and options share one
+        execution (and its result or exception).
+        """
+        return await self._acoalesce(
+            (user_query, latency_budget_ms, filters, fallback, selection),
+            self._asearch_and_recommend, user_query, latency_budget_ms, filters, fallback, selection
+        )
+
+    async def _acoalesce(self, request, func, *args):
+        """
+        Awaits func(*args) as the one execution for `request` (query, latency
+        budget, filters, fallback, selection), shared with concurrent identical requests.
+        """
+        if not COALESCE_REQUESTS:
+            return await func(*args)
+        user_query, latency_budget_ms, filters, fallback, selection = request
+        key = (normalize_text(user_query), filters, selection, latency_budget_ms, fallback)
+        result, shared = await self._flights.ado(key, func, *args)
+        return self._coalesced(result) if shared else result
+
+    async def _asearch_and_recommend(self, user_query, latency_budget_ms=None, filters=None, fallback=True,
+                                     selection=None):
+        log.debug("Processing query", extra={"fields": {"query": user_query}})
+
+        loop = asyncio.get_running_loop()
+        deadline = self._deadline(loop, latency_budget_ms)
+        # copy_context() carries the request ID into the worker thread's log lines
+        state, query_vector, cached, docs = await loop.run_in_executor(
+            self._executor, contextvars.copy_context().run, self._prepare, user_query, filters, selection
+        )
+        if cached is not None:
+            return cached
+
+        return await self._acomplete(state, user_query, query_vector, docs, deadline, filters, fallback, selection)
+
+    async def astream_recommendations(self, user_query, latency_budget_ms=None, filters=None, selection=None):
+        """
+        Streaming variant of asearch_and_recommend: yields ("preliminary", result)
+        with the retrieval-ranked candidates as soon as retrieval is done, then
+        ("final", result) once the LLM (or its fallback) has answered.
+        Cached, lexical and no-match answers are final at once (no preliminary).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = self._deadline(loop, latency_budget_ms)
+        state, query_vector, cached, docs = await loop.run_in_executor(
+            self._executor, contextvars.copy_context().run, self._prepare, user_query, filters, selection
+        )
+        if cached is not None:
+            yield "final", cached
+            return
+        if not docs:
+            yield "final", self._no_match()
+            return
+
+        # Built inside the span, yielded outside it: the generator waits at the yield while the client reads
+        with span("hydration"):
+            preliminary = self._preliminary(state, docs)
+        yield "preliminary", preliminary
+        # Same flight key as asearch_and_recommend, so streams and plain requests for the
+        # same query share one LLM call; the stream's own candidates go straight to it
+        yield "final", await self._acoalesce(
+            (user_query, latency_budget_ms, filters, True, selection),
+            self._acomplete, state, user_query, query_vector, docs, deadline, filters, True, selection
+        )
+
+    def search_and_recommend_many(self, queries, filters=None, selection=None):
+        """
+        Batch Pipeline: one batched embedding pass and one retrieval matmul for
+        all queries, then LLM selection per query (at most LLM_CONCURRENCY at once).
+        Returns one {"query", "recommended_assessments", "error"} item per query.
+        The same filters (and selection mode) apply to every query in the batch.
+        """
+        log.debug("Processing batch", extra={"fields": {"queries": len(queries)}})
+
+        try:
+            prepared = self._prepare_many(queries, filters, selection)
+        except Exception as e:
+            return [self._batch_item(q, error=e) for q in queries]
+
+        with ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._complete_prepared, q, p, filters, selection)
+                       for q, p in zip(queries, prepared)]
+
+        items = []
+        for query, future in zip(queries, futures):
+            try:
+                items.append(self._batch_item(query, result=future.result()))
+            except Exception as e:
+                items.append(self._batch_item(query, error=e))
+        return items
+
+    async def asearch_and_recommend_many(self, queries, latency_budget_ms=None, filters=None, selection=None):
+        """Async variant of search_and_recommend_many; the latency budget covers the whole batch"""
+        log.debug("Processing batch", extra={"fields": {"queries": len(queries)}})
+
+        loop = asyncio.get_running_loop()
+        deadline = self._deadline(loop, latency_budget_ms)
+        try:
+            prepared = await loop.run_in_executor(
+                self._executor, contextvars.copy_context().run, self._prepare_many, queries, filters, selection
             )
-        
-        candidates_text = "\n".join(candidates)
-
-        # Step B: Context Engineering
-        prompt = PromptTemplate(
-            template="""
-            You are an expert HR Recruitment Consultant.
-            
-            USER QUERY: "{query}"
-            
-            Here are 15 available assessments from the SHL catalog:
-            {candidates}
-            
-            TASK:
-            Select a set of 5 to 10 assessments that best match the user's needs.
-            
-            CRITICAL RULES:
-            1. **Relevance**: Must match the job role.
-            2. **Balance**: If the query implies a role (like "Manager" or "Developer"), you MUST select a mix of:
-               - "Knowledge & Skills" (Hard skills)
-               - "Personality & Behavior" (Soft skills/Culture fit)
-               - "Ability & Aptitude" (Cognitive fit)
-            3. **Quantity**: Minimum 5, Maximum 10.
-            
-            OUTPUT FORMAT:
-            Return ONLY a valid JSON object with a key "selected_ids" containing the list of integer IDs.
-            Example: {{ "selected_ids": [0, 2, 5, 8] }}
-            """,
-            input_variables=["query", "candidates"]
+        except Exception as e:
+            return [self._batch_item(q, error=e) for q in queries]
+
+        outcomes = await asyncio.gather(
+            *(self._acomplete_prepared(q, p, deadline, filters, selection) for q, p in zip(queries, prepared)),
+            return_exceptions=True
         )
 
-        chain = prompt | self.llm | JsonOutputParser()
-        
-        final_recommendations = []
-        
+        items = []
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, Exception):
+                items.append(self._batch_item(query, error=outcome))
+            else:
+                items.append(self._batch_item(query, result=outcome))
+        return items
+
+    def retrieve_many(self, queries, k=MAX_CANDIDATES, filters=None, adaptive=False):
+        """
+        Retrieval stage only (for evaluation): the ranked candidate documents
+        the LLM would see for each query. No shortcut, response cache or LLM.
+        adaptive=True applies the same score-gap cut as the live path.
+        """
+        state = self.state
+        with span("embedding"):
+            vectors = self.embeddings.embed_documents(list(queries))
+        with span("retrieval"):
+            return self._retrieve_many(state, list(queries), vectors, k=k, filters=filters, adaptive=adaptive)
+
+    def validate_filters(self, filters):
+        """Raises ValueError if the filters name test types the catalog does not have"""
+        state = self.state
+        if state.index is not None:
+            state.index.filters.validate(filters)
+        else:
+            state.chroma_filters[0].validate(filters)
+
+    def _prepare(self, user_query, filters=None, selection=None):
+        """
+        Answers product-name queries from the lexical index; otherwise embeds the
+        query and checks the response cache (which holds LLM answers, so local
+        selection skips it), retrieving candidates on a miss.
+        Returns (index state, query vector, finished result or None, candidates).
+        """
+        self._check_index_version()
+        state = self.state
+        shortcut = self._lexical_shortcut(state, user_query, filters)
+        if shortcut is not None:
+            return state, None, shortcut, None
+
+        with span("embedding"):
+            query_vector = self.embeddings.embed_query(user_query)
+        cached = self._cached_answer(user_query, query_vector, filters, selection)
+        if cached is not None:
+            log.debug("Served from response cache")
+            return state, query_vector, dict(cached, source="cache"), None
+
+        with span("retrieval"):
+            docs = self._retrieve(state, user_query, query_vector, k=MAX_CANDIDATES, filters=filters)
+        return state, query_vector, None, docs
+
+    def _prepare_many(self, queries, filters=None, selection=None):
+        """Batched _prepare: one embedding pass, then one retrieval for all cache misses"""
+        self._check_index_version()
+        state = self.state
+        prepared = [None] * len(queries)
+        valid = []
+        for i, query in enumerate(queries):
+            if not query.strip():
+                prepared[i] = ValueError("Query cannot be empty")
+                continue
+            shortcut = self._lexical_shortcut(state, query, filters)
+            if shortcut is not None:
+                prepared[i] = (state, None, shortcut, None)
+            else:
+                valid.append(i)
+        if not valid:
+            return prepared
+
+        # Cache-aware: only texts not seen before go through the model, in one batch
+        with span("embedding"):
+            vectors = self.embeddings.embed_documents([queries[i] for i in valid])
+
+        pending = []
+        for i, vector in zip(valid, vectors):
+            cached = self._cached_answer(queries[i], vector, filters, selection)
+            if cached is not None:
+                prepared[i] = (state, vector, dict(cached, source="cache"), None)
+            else:
+                pending.append((i, vector))
+
+        with span("retrieval"):
+            docs_per_query = self._retrieve_many(
+                state, [queries[i] for i, _ in pending], [vector for _, vector in pending],
+                k=MAX_CANDIDATES, filters=filters
+            )
+        for (i, vector), docs in zip(pending, docs_per_query):
+            prepared[i] = (state, vector, None, docs)
+        return prepared
+
+    def _cached_answer(self, user_query, query_vector, filters, selection):
+        """The cached LLM answer, unless the request asked for local selection"""
+        if (selection or SELECTION_MODE) == "local":
+            return None
+        return self.response_cache.lookup(user_query, query_vector, scope=filters)
+
+    def _complete_prepared(self, user_query, prepared, filters=None, selection=None):
+        if isinstance(prepared, Exception):
+            raise prepared
+        state, query_vector, cached, docs = prepared
+        if cached is not None:
+            return cached
+        return self._complete(state, user_query, query_vector, docs, filters, selection)
+
+    async def _acomplete_prepared(self, user_query, prepared, deadline=None, filters=None, selection=None):
+        if isinstance(prepared, Exception):
+            raise prepared
+        state, query_vector, cached, docs = prepared
+        if cached is not None:
+            return cached
+        return await self._acomplete(state, user_query, query_vector, docs, deadline, filters, selection=selection)
+
+    def _complete(self, state, user_query, query_vector, docs, filters=None, selection=None):
+        """Step C: Context Engineering + LLM selection (or the local reranker), then hydration"""
+        if not docs:
+            return self._no_match()
+        if self._selection_mode(selection) == "local":
+            return self._complete_locally(state, user_query, query_vector, docs, filters)
+        with span("prompt_build"):
+            doc_map, inputs, prompt_tokens = self._build_prompt_inputs(user_query, docs)
+
+        response = None
         try:
-            # Try LLM Generation
-            response = chain.invoke({"query": user_query, "candidates": candidates_text})
-            selected_ids = response.get("selected_ids", [])
-            
-            # Hydrate selected IDs
-            for pid in selected_ids:
-                if pid in doc_map:
-                    self._add_to_list(final_recommendations, doc_map[pid])
-            
-            print("AI Selection Successful.")
+            with span("llm"):
+                response = self._selection_chain().invoke(inputs)
+            selected = self._parse_selection(response, doc_map)
+            source = "llm"
+            log.debug("LLM selection successful", extra={"fields": {"selected": len(selected)}})
+        except Exception as e:
+            self._llm_failed(e)
+            selected, source = self._rerank(state, query_vector, doc_map), "fallback_error"
 
+        with span("hydration"):
+            result = self._finalize(state, user_query, query_vector, doc_map, selected, source, filters)
+        return self._with_token_usage(result, len(doc_map), prompt_tokens, response)
+
+    async def _acomplete(self, state, user_query, query_vector, docs, deadline=None, filters=None, fallback=True,
+                         selection=None):
+        """Async _complete: the LLM is awaited under the concurrency limit and the deadline"""
+        if not docs:
+            return self._no_match()
+        if self._selection_mode(selection) == "local":
+            return self._complete_locally(state, user_query, query_vector, docs, filters)
+        with span("prompt_build"):
+            doc_map, inputs, prompt_tokens = self._build_prompt_inputs(user_query, docs)
+
+        response = None
+        try:
+            response, hedged = await self._aselect(inputs, deadline)
+            selected = self._parse_selection(response, doc_map)
+            source = "llm_hedged" if hedged else "llm"
+            log.debug("LLM selection successful", extra={"fields": {"selected": len(selected), "hedged": hedged}})
+        except asyncio.TimeoutError:
+            if not fallback:
+                raise
+            log.warning("Latency budget exhausted. Switching to fallback mode.")
+            selected, source = self._rerank(state, query_vector, doc_map), "fallback_deadline"
         except Exception as e:
-            print(f"LLM Error/Timeout ({e}). Switching to Fallback Mode.")
-            # FALLBACK: If LLM fails, return the top 5 raw semantic matches
+            self._llm_failed(e)
+            if not fallback:
+                raise
+            selected, source = self._rerank(state, query_vector, doc_map), "fallback_error"
+
+        with span("hydration"):
+            result = self._finalize(state, user_query, query_vector, doc_map, selected, source, filters)
+        return self._with_token_usage(result, len(doc_map), prompt_tokens, response)
+
+    async def _aselect(self, inputs, deadline):
+        """
+        Awaits the LLM until the deadline (loop time, None = no limit).
+        If hedging is enabled and the first call, once it holds an LLM slot,
+        is slower than the recent latency percentile, a second call is fired
+        when a slot is free and the first success wins.
+        Returns (response, hedged), hedged meaning the second call's response
+        won; raises asyncio.TimeoutError past the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        limiter = self._llm_limiter()
+
+        async def call(started=None):
+            async with limiter:
+                if started is not None:
+                    started.set()
+                start = time.perf_counter()
+                with span("llm"):
+                    response = await self._selection_chain().ainvoke(inputs)
+                self._llm_latencies.append(time.perf_counter() - start)
+                return response
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - loop.time())
+
+        # Requests queued or waiting on the LLM; "auto" selection goes local once this reaches LLM_CONCURRENCY.
+        # Counted before the first await so requests arriving in the same loop tick see each other.
+        self._llm_in_flight += 1
+        started = asyncio.Event()
+        first = asyncio.ensure_future(call(started))
+        pending = {first}
+        hedge = None
+        last_error = None
+        try:
+            hedge_delay = self._hedge_delay()
+            if hedge_delay is not None:
+                # The recorded latencies cover time inside the slot, so the hedge clock starts there too
+                waiting = asyncio.ensure_future(started.wait())
+                try:
+                    await asyncio.wait({first, waiting}, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    waiting.cancel()
+                if not started.is_set() and not first.done():
+                    raise asyncio.TimeoutError()
+                if not first.done() and (remaining() is None or hedge_delay < remaining()):
+                    done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                    # A hedge that would only queue behind other requests adds load without saving time
+                    if not done and not limiter.locked():
+                        log.info("LLM slow. Sending hedged request.", extra={"fields": {"hedge_delay_ms": round(hedge_delay * 1000)}})
+                        hedge = asyncio.ensure_future(call())
+                        pending.add(hedge)
+
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        return task.result(), task is hedge
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            self._llm_in_flight -= 1
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self):
+        """Hedging delay in seconds, or None until enough latencies have been observed"""
+        if LLM_HEDGE_PERCENTILE <= 0 or len(self._llm_latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return float(np.percentile(self._llm_latencies, LLM_HEDGE_PERCENTILE))
+
+    def _deadline(self, loop, latency_budget_ms):
+        """Absolute loop-time deadline for a request, or None when unbounded"""
+        budget = LATENCY_BUDGET_MS if latency_budget_ms is None else latency_budget_ms
+        return loop.time() + budget / 1000 if budget > 0 else None
+
+    def _coalesced(self, result):
+        """A follower's copy of the leader's result"""
+        log.debug("Coalesced with an identical in-flight query")
+        return dict(result)
+
+    def _batch_item(self, query, result=None, error=None):
+        if error is not None:
+            return {"query": query, "recommended_assessments": [], "source": None, "error": str(error)}
+        return {
+            "query": query,
+            "recommended_assessments": result["recommended_assessments"],
+            "source": result["source"],
+            "error": None
+        }
+
+    def _build_prompt_inputs(self, user_query, docs):
+        """
+        Compact candidate block: one ID|name|types|description line per distinct
+        product, type names replaced by catalog letters (legend once) and repeated
+        descriptions referenced by ID. Trimmed to PROMPT_TOKEN_BUDGET: trailing
+        candidates go first (down to MIN_CANDIDATES), then description length.
+        Returns (ID -> metadata, prompt inputs, estimated prompt tokens).
+        """
+        unique = self._unique_candidates(docs)
+        count = len(unique)
+        description_chars = DESCRIPTION_CHARS
+        while True:
+            inputs = self._render_candidates(user_query, unique[:count], description_chars)
+            prompt_tokens = estimate_tokens(SELECTION_PROMPT) + sum(estimate_tokens(v) for v in inputs.values())
+            if prompt_tokens <= PROMPT_TOKEN_BUDGET or (count <= MIN_CANDIDATES and description_chars == 0):
+                break
+            if count > MIN_CANDIDATES:
+                count -= 1
+            else:
+                description_chars //= 2
+
+        telemetry.record_candidates(count)
+        doc_map = {idx: doc.metadata for idx, (_, doc) in enumerate(unique[:count])}
+        return doc_map, inputs, prompt_tokens
+
+    def _unique_candidates(self, docs):
+        """[(name, doc)] without repeats: the same product can be reached twice (vector + BM25, or two catalog URLs)"""
+        unique = []
+        seen_names = set()
+        for doc in docs:
+            name = NEW_SUFFIX.sub("", doc.metadata['name'])
+            if name.lower() not in seen_names:
+                seen_names.add(name.lower())
+                unique.append((name, doc))
+        return unique
+
+    def _render_candidates(self, user_query, candidates, description_chars):
+        lines = []
+        codes = set()
+        first_with_description = {}
+        for idx, (name, doc) in enumerate(candidates):
+            types = [TYPE_CODES.get(t.strip(), t.strip()) for t in doc.metadata['test_type'].split(",") if t.strip()]
+            codes.update(types)
+            description = candidate_description(doc, name, description_chars)
+            if description and description in first_with_description:
+                description = f"={first_with_description[description]}"
+            elif description:
+                first_with_description[description] = idx
+            lines.append(f"{idx}|{name}|{''.join(types)}|{description}")
+
+        legend = ", ".join(f"{code}={name}" for name, code in TYPE_CODES.items() if code in codes)
+        return {"query": user_query, "count": str(len(lines)), "types": legend, "candidates": "\n".join(lines)}
+
+    def _selection_chain(self):
+        """prompt | llm, built once; the reply is parsed separately so token usage stays readable"""
+        if self._chain is None:
+            llm = self.llm
+            with self._chain_lock:
+                if self._chain is None:
+                    from langchain_core.prompts import PromptTemplate
+                    from langchain_core.output_parsers import JsonOutputParser
+
+                    prompt = PromptTemplate(
+                        template=SELECTION_PROMPT,
+                        input_variables=["query", "count", "types", "candidates"]
+                    )
+                    self._output_parser = JsonOutputParser()
+                    self._chain = prompt | llm
+        return self._chain
+
+    def _parse_selection(self, response, doc_map):
+        """
+        Maps the LLM's selected IDs back to candidate metadata. A reply with no
+        valid ID raises, so it is handled (and not cached) like any LLM failure.
+        """
+        selected_ids = self._output_parser.invoke(response).get("selected_ids", [])
+        selected = [doc_map[pid] for pid in selected_ids if pid in doc_map]
+        if not selected:
+            raise ValueError(f"LLM selected no valid candidate IDs ({selected_ids!r})")
+        return selected
+
+    def _with_token_usage(self, result, candidates, prompt_tokens, response):
+        """
+        Attaches per-request token counts: the local estimate plus the
+        provider's reported usage when the LLM answered (not part of the API body).
+        """
+        usage = getattr(response, "usage_metadata", None) or {}
+        tokens = {
+            "candidates": candidates,
+            "prompt_estimate": prompt_tokens,
+            "input": usage.get("input_tokens"),
+            "output": usage.get("output_tokens"),
+        }
+        telemetry.record_tokens(tokens)
+        log.debug("LLM tokens", extra={"fields": tokens})
+        return dict(result, tokens=tokens)
+
+    def _selection_mode(self, selection=None):
+        """Resolves the request's selection mode to llm or local ("auto" depends on how busy the LLM slots are)"""
+        mode = selection or SELECTION_MODE
+        if mode not in SELECTION_MODES:
+            raise ValueError(f"Unknown selection mode: {mode}")
+        if mode == "auto":
+            return "local" if self._llm_in_flight >= LLM_CONCURRENCY else "llm"
+        return mode
+
+    def _complete_locally(self, state, user_query, query_vector, docs, filters=None):
+        """Local selection over every distinct candidate; no prompt, no LLM"""
+        doc_map = {idx: doc.metadata for idx, (_, doc) in enumerate(self._unique_candidates(docs))}
+        selected = self._rerank(state, query_vector, doc_map)
+        with span("hydration"):
+            return self._finalize(state, user_query, query_vector, doc_map, selected, "local", filters)
+
+    def _rerank(self, state, query_vector, doc_map):
+        """
+        reranker.select over the candidates' stored embeddings, as metadata in
+        selection order. None if the embeddings cannot be read (raw top 5 then).
+        """
+        with span("rerank"):
+            metas = list(doc_map.values())
+            try:
+                vectors = self._candidate_vectors(state, [meta['url'] for meta in metas])
+            except Exception as e:
+                log.warning(f"Local reranker unavailable ({e}).")
+                return None
+            if vectors is None:
+                return None
+            types = [reranker.split_types(meta['test_type']) for meta in metas]
+            return [metas[i] for i in reranker.select(query_vector, vectors, types)]
+
+    def _candidate_vectors(self, state, urls):
+        """Stored embeddings for the candidate URLs (in order), or None if any is missing"""
+        if state.index is not None:
+            return state.index.vectors_by_url(urls)
+        stored = state.db.get(where={"url": {"$in": urls}}, include=["embeddings", "metadatas"])
+        by_url = {meta['url']: vector for meta, vector in zip(stored["metadatas"], stored["embeddings"])}
+        if any(url not in by_url for url in urls):
+            return None
+        return np.array([by_url[url] for url in urls], dtype=np.float32)
+
+    def _llm_failed(self, error):
+        telemetry.record_llm_error(error)
+        log.warning(f"LLM error ({error}).",
+                    extra={"fields": {"error_type": type(error).__name__}})
+
+    def _llm_limiter(self):
+        # Created lazily so the semaphore binds to the server's running loop
+        if self._llm_semaphore is None:
+            self._llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        return self._llm_semaphore
+
+    def _preliminary(self, state, docs):
+        """Retrieval order, distinct products, at most 10: what the UI shows while the LLM works"""
+        catalog = state.catalog
+        recommendations = [catalog.record(doc.metadata) for _, doc in self._unique_candidates(docs)[:10]]
+        return {"recommended_assessments": recommendations, "source": "retrieval"}
+
+    def _no_match(self):
+        """Nothing in the catalog satisfies the filters; no point asking the LLM"""
+        log.debug("No assessment matches the filters")
+        return {"recommended_assessments": [], "source": "no_match"}
+
+    def _finalize(self, state, user_query, query_vector, doc_map, selected, source, filters=None):
+        """
+        Looks up the selection's (or the raw fallback's) prebuilt records,
+        enforces 5-10 results and caches LLM answers.
+        """
+        catalog = state.catalog
+
+        if selected is not None:
+            final_recommendations = [catalog.record(meta) for meta in selected]
+        else:
+            # FALLBACK: If the LLM and the local reranker both fail, return the top 5 raw semantic matches
             # This ensures the API NEVER returns empty
-            for i in range(5):
-                if i in doc_map:
-                    self._add_to_list(final_recommendations, doc_map[i])
+            final_recommendations = [catalog.record(doc_map[i]) for i in range(5) if i in doc_map]
 
         # Ensure Min 5 / Max 10 constraint
         # If AI picked too few, fill with top search results
         if len(final_recommendations) < 5:
-            print("Not enough recommendations. Filling with search results.")
-            for i in range(15):
+            log.debug("Not enough recommendations. Filling with search results.")
+            current_names = {record['name'] for record in final_recommendations}
+            for i in range(len(doc_map)):
                 if len(final_recommendations) >= 5: break
                 # Check if this doc is already added (by name)
-                current_names = [x['name'] for x in final_recommendations]
                 if doc_map[i]['name'] not in current_names:
-                    self._add_to_list(final_recommendations, doc_map[i])
+                    current_names.add(doc_map[i]['name'])
+                    final_recommendations.append(catalog.record(doc_map[i]))
 
         # Cap at 10
-        return {"recommended_assessments": final_recommendations[:10]}
-
-    def _add_to_list(self, list_obj, meta):
-        """Helper to format and add a document"""
-        list_obj.append({
-            "url": meta['url'],
-            "name": meta['name'],
-            "adaptive_support": meta['adaptive_support'],
-            "description": meta.get('description', 'No description')[:300],
-            "duration": int(meta['duration']),
-            "remote_support": meta['remote_support'],
-            "test_type": [meta['test_type']]
-        })
+        result = {"recommended_assessments": final_recommendations[:10], "source": source}
+
+        # Only cache the LLM's own selections; local and fallback answers are cheap to redo (and the LLM may do better)
+        # (not when the index was swapped meanwhile: the reload has just emptied the cache)
+        if source in ("llm", "llm_hedged") and selected and state is self.state:
+            self.response_cache.store(user_query, query_vector, result, scope=filters)
+        return result
+
+    def _retrieve(self, state, user_query, query_vector, k, filters=None, adaptive=True):
+        """
+        Top-k documents from the configured retrieval backend, fused with BM25 when
+        enabled, then cut to the adaptive candidate count from the similarity scores.
+        """
+        if self.backend == "numpy":
+            scored = state.index.similarity_search_with_score_by_vector(query_vector, k=k, filters=filters)
+        else:
+            scored = self._chroma_search(state, query_vector, k, filters)
+        docs = self._fuse(state, user_query, [doc for doc, _ in scored], k, filters)
+        return docs[:self._candidate_count(scored)] if adaptive else docs
+
+    def _retrieve_many(self, state, queries, query_vectors, k, filters=None, adaptive=True):
+        """Batched _retrieve; the NumPy backend answers all queries with one matmul"""
+        if self.backend == "numpy":
+            scored_per_query = state.index.similarity_search_with_score_by_vectors(query_vectors, k=k, filters=filters)
+        else:
+            scored_per_query = [self._chroma_search(state, v, k, filters) for v in query_vectors]
+        results = []
+        for query, scored in zip(queries, scored_per_query):
+            docs = self._fuse(state, query, [doc for doc, _ in scored], k, filters)
+            results.append(docs[:self._candidate_count(scored)] if adaptive else docs)
+        return results
+
+    def _candidate_count(self, scored):
+        """Candidates within CANDIDATE_SCORE_GAP of the best similarity, clamped to [MIN, MAX]_CANDIDATES"""
+        if not ADAPTIVE_CANDIDATES or not scored:
+            return MAX_CANDIDATES
+        floor = scored[0][1] - CANDIDATE_SCORE_GAP
+        close = sum(1 for _, score in scored if score >= floor)
+        return max(MIN_CANDIDATES, min(MAX_CANDIDATES, close))
+
+    def _chroma_search(self, state, query_vector, k, filters=None):
+        """
+        Chroma search restricted up front to the rows the filter bitmaps allow.
+        Returns [(Document, cosine similarity)]: the store uses squared L2 over
+        unit vectors, so similarity = 1 - distance / 2.
+        """
+        where = None
+        if filters is not None:
+            filter_index, urls = state.chroma_filters
+            rows = filter_index.rows(filters)
+            if len(rows) == 0:
+                return []
+            where = {"url": {"$in": [urls[row] for row in rows]}}
+        scored = state.db.similarity_search_by_vector_with_relevance_scores(query_vector, k=k, filter=where)
+        return [(doc, 1.0 - distance / 2) for doc, distance in scored]
+
+    def _load_store(self, previous_db=None):
+        """
+        (Chroma client or None, NumpyIndex or None, chroma filter bitmaps or None).
+        The numpy backend serves from the snapshot and never opens Chroma,
+        unless the store predates snapshots.
+        """
+        if self.backend == "numpy":
+            index = NumpyIndex.from_snapshot()
+            if index is not None:
+                return None, index, None
+            log.warning("No index snapshot found (run vector_store.py). Loading vectors from Chroma.")
+
+        from langchain_chroma import Chroma
+        if previous_db is not None:
+            # The store was written by another process; drop Chroma's cached
+            # segments so the new client reads it fresh from disk
+            previous_db._client.clear_system_cache()
+        db = Chroma(persist_directory=DB_DIR, embedding_function=self.embeddings)
+        if self.backend == "numpy":
+            return db, NumpyIndex.from_chroma(db), None
+        return db, None, self._load_chroma_filters(db)
+
+    def _load_chroma_filters(self, db):
+        metadatas = db.get(include=["metadatas"])["metadatas"]
+        return MetadataFilterIndex(metadatas), [meta['url'] for meta in metadatas]
+
+    def _fuse(self, state, user_query, docs, k, filters=None):
+        """Reciprocal-rank fusion of the vector results with the BM25 top-k"""
+        lexical = state.lexical
+        if lexical is None or not HYBRID_RETRIEVAL:
+            return docs
+
+        by_url = {doc.metadata['url']: doc for doc in docs}
+        lexical_urls = []
+        for row in lexical.search(user_query, k, filters)[0]:
+            meta = lexical.metadata(row)
+            if meta['url'] not in by_url:
+                # BM25-only hit: take the stored text (for the prompt's description) when the index has it
+                stored = state.index.document_by_url(meta['url']) if state.index is not None else None
+                by_url[meta['url']] = stored or Document(page_content="", metadata=meta)
+            lexical_urls.append(meta['url'])
+
+        ranking = reciprocal_rank_fusion([[doc.metadata['url'] for doc in docs], lexical_urls])
+        return [by_url[url] for url in ranking[:k]]
+
+    def _lexical_shortcut(self, state, user_query, filters=None):
+        """
+        Result for a query that names products outright: the named products
+        first, then the best BM25 matches up to 5 among products whose name
+        shares a word with the query ("Java 8" -> other Java tests; a shared
+        number alone does not count). None for any other query, and when that
+        cannot fill 5 results (the full pipeline answers then).
+        """
+        lexical = state.lexical
+        if lexical is None or not LEXICAL_SHORTCUT:
+            return None
+        rows = lexical.name_matches(user_query, filters=filters)
+        if rows is None:
+            return None
+
+        log.debug("Exact product match. Answered from the lexical index.")
+        catalog = state.catalog
+        final_recommendations = []
+        seen = set()
+        words = {token for token in tokenize(user_query) if not token.isdigit()}
+        ranked, _ = lexical.search(user_query, len(lexical), filters)
+        related = [int(r) for r in ranked if lexical.name_tokens[r] & words]
+        for i, row in enumerate(list(rows) + related):
+            if row in seen:
+                continue
+            if i >= len(rows) and len(final_recommendations) >= 5:
+                break
+            seen.add(row)
+            final_recommendations.append(catalog.record(lexical.metadata(row)))
+
+        if len(final_recommendations) < 5:
+            log.debug("Too few related products for the shortcut. Running the full pipeline.")
+            return None
+        return {"recommended_assessments": final_recommendations[:10], "source": "lexical"}
+
+    def _load_state(self, version, previous_db=None):
+        """Loads every per-version structure off to the side; nothing serves from it until it is assigned"""
+        db, index, chroma_filters = self._load_store(previous_db)
+        return IndexState(version, db, index, chroma_filters, self._load_lexical(), self._load_catalog(db, index))
+
+    def _load_catalog(self, db, index):
+        metadatas = index.metadatas if index is not None else db.get(include=["metadatas"])["metadatas"]
+        return AssessmentCatalog(metadatas)
+
+    def _load_lexical(self):
+        try:
+            return LexicalIndex.load(LEXICAL_INDEX_FILE)
+        except FileNotFoundError:
+            log.warning(f"No lexical index at '{LEXICAL_INDEX_FILE}' (run vector_store.py). Using vector search only.")
+            return None
+
+    def _check_index_version(self):
+        """Starts a background reload once vector_store.py has published a new index version"""
+        now = time.monotonic()
+        if now - self._last_index_check < INDEX_CHECK_INTERVAL:
+            return
+        self._last_index_check = now
+
+        version = read_index_version()
+        if version != self.index_version and self._reload_lock.acquire(blocking=False):
+            # Requests keep using the current index while the new one loads
+            threading.Thread(target=self._reload_in_background, args=(version,), daemon=True).start()
+
+    def _reload_in_background(self, version):
+        try:
+            self.reload_index(version)
+        except Exception as e:
+            log.error(f"Index reload failed ({e}). Keeping version {self.index_version}.")
+        finally:
+            self._reload_lock.release()
+
+    def reload_index(self, version=None):
+        """
+        Loads the current vector store off to the side and swaps it in as one
+        IndexState. Each request reads self.state once and passes it through
+        every stage, so it sees either the old or the new version, never a mix.
+        Cached responses are dropped.
+        (With the chroma backend, a query racing the swap itself may fail once.)
+        """
+        if version is None:
+            version = read_index_version()
+
+        state = self._load_state(version, self.state.db)
+        index = state.index
+        self.state = state
+        self.response_cache.clear()
+        log.info(f"Swapped to index version {version} ({len(index) if index else 'chroma'} items). Response cache cleared.")
+
+    def cache_stats(self):
+        return {
+            "embedding_cache": self.embeddings.stats(),
+            "response_cache": self.response_cache.stats(),
+            "coalescing": self._flights.stats()
+        }
 
 # --- TEST BLOCK ---
 if __name__ == "__main__":
+    telemetry.configure_logging(fmt="text")
     engine = RecommendationEngine()
     test_query = "Need a Java developer who is good in collaborating with external teams and stakeholders."
     result = engine.search_and_recommend(test_query)
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    print(json.dumps(result, indent=2, default=dict))
\ No newline at end of file
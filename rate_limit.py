@@ -0,0 +1,111 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Async token bucket: refills at `rate` tokens per second and holds at most
+    `capacity` tokens, so short bursts are allowed but the long-run rate is capped.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._refunded = asyncio.Event()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                # Wakes early when a refund makes tokens available
+                self._refunded.clear()
+                try:
+                    await asyncio.wait_for(self._refunded.wait(), (tokens - self._tokens) / self.rate)
+                except asyncio.TimeoutError:
+                    pass
+
+    def refund(self, tokens=1):
+        """Returns tokens taken for work that turned out not to need them"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + tokens)
+        self._refunded.set()
+
+
+class HostRateLimiter:
+    """One TokenBucket per host, created on first use"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+
+    async def acquire(self, url):
+        host = urlsplit(url).netloc
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.capacity)
+        await bucket.acquire()
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """
+    TokenBucket whose rate adapts to the upstream quota (AIMD): a rate-limit
+    response halves the rate and pauses all acquisitions for `cooldown`
+    seconds, and every success adds back `increase` tokens/s up to `max_rate`.
+    """
+
+    def __init__(self, rate, max_rate=None, min_rate=None, increase=None, capacity=None):
+        super().__init__(rate, capacity)
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.min_rate = min_rate if min_rate is not None else self.max_rate / 32
+        self.increase = increase if increase is not None else self.max_rate / 20
+        self._paused_until = 0.0
+
+    async def acquire(self, tokens=1):
+        pause = self._paused_until - time.monotonic()
+        while pause > 0:
+            await asyncio.sleep(pause)
+            pause = self._paused_until - time.monotonic()
+        await super().acquire(tokens)
+
+    def on_success(self):
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_rate_limited(self, cooldown):
+        self._refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = 0.0  # no burst straight after a 429
+        self._paused_until = max(self._paused_until, time.monotonic() + cooldown)
+
+
+def is_rate_limited(error):
+    """True for quota errors (HTTP 429 / RESOURCE_EXHAUSTED) from Gemini or httpx"""
+    status = getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "code", None)
+    if status == 429:
+        return True
+    text = f"{type(error).__name__} {error}"
+    return any(marker in text for marker in ("429", "ResourceExhausted", "RESOURCE_EXHAUSTED", "TooManyRequests",
+                                             "rate limit", "quota"))
+
+
+def retry_after(error, default):
+    """Seconds the server asked us to wait, if the error carries a Retry-After header"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After", default))
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+
+# --- CONFIGURATION ---
+# Relevance vs novelty trade-off for MMR (1.0 = pure similarity ranking)
+MMR_LAMBDA = 0.7
+# No test type may fill more than this share of the selection...
+MAX_TYPE_SHARE = 0.6
+# ...and each of these is included when the candidates offer it (the prompt's "Balance" rule)
+BALANCE_TYPES = ("Knowledge & Skills", "Personality & Behavior", "Ability & Aptitude")
+# Results beyond MIN_RESULTS are only added while they stay this close (cosine) to the best match
+RELEVANCE_GAP = 0.1
+MIN_RESULTS = 5
+MAX_RESULTS = 10
+
+
+def split_types(test_type):
+    """'Competencies, Personality & Behavior' -> ['Competencies', 'Personality & Behavior']"""
+    return [t.strip() for t in test_type.split(",") if t.strip()]
+
+
+def select(query_vector, vectors, test_types, min_results=MIN_RESULTS, max_results=MAX_RESULTS,
+           mmr_lambda=MMR_LAMBDA, max_type_share=MAX_TYPE_SHARE, balance_types=BALANCE_TYPES,
+           relevance_gap=RELEVANCE_GAP):
+    """
+    Deterministic stand-in for the LLM's selection: maximal marginal relevance
+    over the candidates with per-type caps and coverage of the balance types.
+
+    vectors are the candidates' embeddings (rows), test_types their type lists.
+    Returns candidate indices in selection order, between min_results and
+    max_results of them (fewer only if there are fewer candidates).
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    count = len(vectors)
+    if count == 0:
+        return []
+    vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = vectors @ query
+    similarity = vectors @ vectors.T
+    close = int(np.sum(relevance >= relevance.max() - relevance_gap))
+    target = min(count, max(min_results, min(max_results, close)))
+    cap = max(1, math.ceil(target * max_type_share))
+
+    offered = {t for types in test_types for t in types}
+    uncovered = [t for t in balance_types if t in offered]
+    type_counts = {}
+    selected = []
+    redundancy = np.full(count, -np.inf, dtype=np.float32)
+    available = np.ones(count, dtype=bool)
+
+    while len(selected) < target:
+        allowed = available.copy()
+        for i in np.flatnonzero(allowed):
+            if any(type_counts.get(t, 0) >= cap for t in test_types[i]):
+                allowed[i] = False
+        # Once the remaining slots are only enough for the uncovered balance types, only those qualify
+        slots_left = target - len(selected)
+        if uncovered and slots_left <= len(uncovered):
+            covering = np.array([any(t in uncovered for t in types) for types in test_types])
+            if np.any(allowed & covering):
+                allowed &= covering
+        if not np.any(allowed):
+            allowed = available  # the caps cannot all be met; relevance decides
+        if not np.any(allowed):
+            break
+
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(allowed, mmr_lambda * relevance - (1 - mmr_lambda) * penalty, -np.inf)
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+        for t in test_types[best]:
+            type_counts[t] = type_counts.get(t, 0) + 1
+        uncovered = [t for t in uncovered if t not in test_types[best]]
+
+    return selected
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from embedding_cache import normalize_text
+
+# --- CONFIGURATION ---
+DEFAULT_MAX_SIZE = 512
+DEFAULT_TTL_SECONDS = 3600
+# Cosine similarity above which two queries are treated as the same request
+DEFAULT_THRESHOLD = 0.9
+
+
+class SemanticResponseCache:
+    """
+    Caches final recommendation responses in front of the LLM stage.
+
+    A lookup first tries the normalized query text, then falls back to the
+    closest cached query embedding if its cosine similarity clears the
+    threshold. Entries expire after a TTL and the oldest are evicted past
+    max_size. A scope (e.g. the request's filters) keeps answers to the same
+    query under different constraints apart.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 threshold=DEFAULT_THRESHOLD):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        # (scope, key) -> (unit query vector, response, insertion time)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Stacked vectors for the near-duplicate scan, rebuilt lazily after writes
+        self._keys = []
+        self._matrix = None
+        self._scope_rows = {}
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def lookup(self, query, query_vector=None, scope=None):
+        """Returns the cached response for this query or a near-duplicate in the same scope, else None"""
+        if self.max_size <= 0:
+            return None
+
+        key = (scope, normalize_text(query))
+        with self._lock:
+            self._expire(time.monotonic())
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.exact_hits += 1
+                return entry[1]
+
+            if query_vector is not None and self._entries:
+                if self._matrix is None:
+                    self._keys = list(self._entries)
+                    self._matrix = np.stack([self._entries[k][0] for k in self._keys])
+                    self._scope_rows = {}
+                    for row, (entry_scope, _) in enumerate(self._keys):
+                        self._scope_rows.setdefault(entry_scope, []).append(row)
+                rows = self._scope_rows.get(scope)
+                if rows:
+                    scores = self._matrix[rows] @ _unit(query_vector)
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        self.semantic_hits += 1
+                        return self._entries[self._keys[rows[best]]][1]
+
+            self.misses += 1
+            return None
+
+    def store(self, query, query_vector, response, scope=None):
+        if self.max_size <= 0:
+            return
+
+        key = (scope, normalize_text(query))
+        with self._lock:
+            self._entries[key] = (_unit(query_vector), response, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        """Drops every entry, e.g. after the vector store was rebuilt"""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _expire(self, now):
+        # Entries are kept in insertion order, so expired ones sit at the front
+        expired = False
+        while self._entries:
+            key, (_, _, created) = next(iter(self._entries.items()))
+            if now - created < self.ttl_seconds:
+                break
+            self._entries.popitem(last=False)
+            expired = True
+        if expired:
+            self._matrix = None
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            total = hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hit_rate": hits / total if total else 0.0,
+            }
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait and receive the same result, or the same
+    exception. The key is released as soon as the call finishes, so later
+    calls run again (answers that should be reused belong in a cache).
+    do() is for threads, ado() for coroutines on one event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args):
+        """Returns (result, shared); shared is True when another caller's execution was reused"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key, func, *args):
+        """
+        Async do(): func(*args) is a coroutine run as a task. Every caller
+        awaits it through a shield, so one caller being cancelled (e.g. a
+        client disconnect) does not cancel the others' shared execution.
+        """
+        task = self._tasks.get(key)
+        shared = task is not None and not task.done()
+        if shared:
+            with self._lock:
+                self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(func(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+            with self._lock:
+                self.leaders += 1
+        return await asyncio.shield(task), shared
+
+    def _release(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here, so no warning if every waiter was cancelled
+
+    def stats(self):
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._tasks),
+        }
@@ -0,0 +1,76 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Pipeline stages timed by rag_engine.py, in request order
+STAGES = ("embedding", "retrieval", "prompt_build", "llm", "rerank", "hydration")
+
+_listeners = []
+
+
+def add_listener(listener):
+    """listener(stage, seconds) is called after every timed stage, from whichever thread ran it"""
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+@contextmanager
+def span(stage):
+    """Times the enclosed block as one stage; costs one list check when nobody listens"""
+    if not _listeners:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        for listener in list(_listeners):
+            listener(stage, seconds)
+
+
+class StageRecorder:
+    """Listener that keeps every sample per stage, for benchmark reports"""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def __call__(self, stage, seconds):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        """{stage: {"count", "p50_ms", "p95_ms", "p99_ms", "mean_ms"}} for every stage that ran"""
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self.samples.items() if values}
+        return {stage: latency_summary(values) for stage, values in samples.items()}
+
+
+def timed(func, *args, **kwargs):
+    """(func's result, seconds it took), for benchmarks timing a call outside the pipeline's spans"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def summary_line(label, seconds):
+    """One benchmark report line: p50 and p95 of the samples in ms"""
+    summary = latency_summary(seconds)
+    return f"  {label:<26} p50 {summary['p50_ms']:9.3f} ms   p95 {summary['p95_ms']:9.3f} ms"
+
+
+def latency_summary(seconds):
+    values = np.asarray(seconds, dtype=np.float64) * 1000
+    return {
+        "count": int(len(values)),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+    }
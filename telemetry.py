@@ -0,0 +1,188 @@
+import json
+import logging
+import os
+import time
+import uuid
+from contextvars import ContextVar
+
+import stage_timing
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+    from prometheus_client.core import CounterMetricFamily
+    HAVE_PROMETHEUS = True
+except ImportError: # The API works without it; /metrics is then disabled
+    HAVE_PROMETHEUS = False
+
+# --- CONFIGURATION ---
+# Prometheus metrics on /metrics (0 = off: no listeners, every record_* call returns at once)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# "json" = one JSON object per line, "text" = plain lines for local runs
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CANDIDATE_BUCKETS = (0, 5, 10, 15, 20, 30)
+TOKEN_BUCKETS = (100, 200, 300, 400, 500, 600, 800, 1000, 1500, 2000)
+
+# Set per request by main.py and copied into the engine's worker threads
+request_id = ContextVar("request_id", default=None)
+
+
+# --- LOGGING ---
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, request_id, message and any `fields` passed via extra"""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": request_id.get(),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"{self.formatTime(record)} {record.levelname:<7} [{request_id.get() or '-'}] {record.getMessage()}"
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+_logging_configured = False
+
+
+def configure_logging(fmt=LOG_FORMAT, level=LOG_LEVEL):
+    """Routes the serving modules' loggers to stdout in the chosen format (idempotent)"""
+    global _logging_configured
+    if _logging_configured:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    for name in ("rag_engine", "api"):
+        logger = logging.getLogger(name)
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+    _logging_configured = True
+
+
+def new_request_id(incoming=None):
+    """Keeps a caller-supplied X-Request-ID (bounded length), otherwise generates one"""
+    return incoming[:64] if incoming else uuid.uuid4().hex[:16]
+
+
+# --- METRICS ---
+_enabled = METRICS_ENABLED and HAVE_PROMETHEUS
+_cache_stats_source = None
+
+if _enabled:
+    STAGE_SECONDS = Histogram(
+        "shl_stage_duration_seconds", "Time spent per engine stage", ["stage"], buckets=STAGE_BUCKETS
+    )
+    REQUEST_SECONDS = Histogram(
+        "shl_http_request_duration_seconds", "End-to-end HTTP request latency", ["method", "route", "status"]
+    )
+    RECOMMENDATIONS = Counter(
+        "shl_recommendations", "Recommendation results by serving path (llm, local, cache, lexical, fallback_*, ...)",
+        ["source"]
+    )
+    LLM_ERRORS = Counter("shl_llm_errors", "Failed LLM selections by exception type", ["error_type"])
+    LLM_CANDIDATES = Histogram(
+        "shl_llm_candidates", "Candidates sent to the LLM per query", buckets=CANDIDATE_BUCKETS
+    )
+    PROMPT_TOKENS = Histogram(
+        "shl_llm_prompt_tokens", "Estimated prompt tokens per LLM request", buckets=TOKEN_BUCKETS
+    )
+    LLM_TOKENS = Counter("shl_llm_tokens", "Tokens reported by the LLM provider", ["kind"])
+    FIRST_RESULT_SECONDS = Histogram(
+        "shl_time_to_first_result_seconds", "Time until /recommend/stream sends its first list, by event",
+        ["event"], buckets=STAGE_BUCKETS
+    )
+
+    class _CacheCollector:
+        """Reads the engine's own cache counters at scrape time, so the hot path pays nothing extra"""
+
+        def collect(self):
+            stats = _cache_stats_source() if _cache_stats_source is not None else {}
+            hits = CounterMetricFamily("shl_cache_hits", "Cache hits", labels=["cache"])
+            misses = CounterMetricFamily("shl_cache_misses", "Cache misses", labels=["cache"])
+            if "embedding_cache" in stats:
+                hits.add_metric(["embedding"], stats["embedding_cache"]["hits"])
+                misses.add_metric(["embedding"], stats["embedding_cache"]["misses"])
+            if "response_cache" in stats:
+                response = stats["response_cache"]
+                hits.add_metric(["response"], response["exact_hits"] + response["semantic_hits"])
+                misses.add_metric(["response"], response["misses"])
+            yield hits
+            yield misses
+            if "coalescing" in stats:
+                coalescing = stats["coalescing"]
+                yield CounterMetricFamily(
+                    "shl_coalesced_requests", "Requests that reused an identical in-flight query's execution",
+                    value=coalescing["coalesced"]
+                )
+                yield CounterMetricFamily(
+                    "shl_pipeline_executions", "Pipeline executions started (requests that were not coalesced)",
+                    value=coalescing["leaders"]
+                )
+
+    REGISTRY.register(_CacheCollector())
+    stage_timing.add_listener(lambda stage, seconds: STAGE_SECONDS.labels(stage).observe(seconds))
+elif METRICS_ENABLED:
+    print("prometheus_client is not installed. /metrics is disabled.")
+
+
+def metrics_enabled():
+    return _enabled
+
+
+def set_cache_stats_source(source):
+    """source() returns RecommendationEngine.cache_stats()-shaped dicts"""
+    global _cache_stats_source
+    _cache_stats_source = source
+
+
+def record_request(method, route, status, seconds):
+    if _enabled:
+        REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def record_result(source):
+    if _enabled:
+        RECOMMENDATIONS.labels(source or "error").inc()
+
+
+def record_llm_error(error):
+    if _enabled:
+        LLM_ERRORS.labels(type(error).__name__).inc()
+
+
+def record_candidates(count):
+    if _enabled:
+        LLM_CANDIDATES.observe(count)
+
+
+def record_tokens(tokens):
+    if _enabled:
+        PROMPT_TOKENS.observe(tokens["prompt_estimate"])
+        for kind in ("input", "output"):
+            if tokens[kind] is not None:
+                LLM_TOKENS.labels(kind).inc(tokens[kind])
+
+
+def record_first_result(event, seconds):
+    if _enabled:
+        FIRST_RESULT_SECONDS.labels(event).observe(seconds)
+
+
+def render_metrics():
+    """(body, content type) in the Prometheus text format"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
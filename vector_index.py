@@ -0,0 +1,183 @@
+import sys
+
+import numpy as np
+from langchain_core.documents import Document
+from metadata_filter import MetadataFilterIndex
+from index_snapshot import load_snapshot
+
+# --- CONFIGURATION ---
+DB_DIR = "chroma_db"
+
+
+class NumpyIndex:
+    """
+    Exact in-process search over the whole catalog.
+
+    All vectors are loaded once into a contiguous float32 matrix and
+    L2-normalized up front, so top-k is one matrix-vector product plus
+    argpartition. With ~400 assessments this is exact and cheaper than
+    the HNSW round trip through Chroma.
+    """
+
+    def __init__(self, vectors, metadatas, documents=None, normalized=False):
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if not normalized:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = np.ascontiguousarray(matrix / norms)
+        self.matrix = matrix
+        # Kept as given: a snapshot's MappedTable / mapped document array stays shared with other workers
+        self.metadatas = metadatas if hasattr(metadatas, "__getitem__") else list(metadatas)
+        self.documents = documents if documents is not None else [""] * len(self.metadatas)
+        self.version = None
+        self._url_rows = None
+        self.filters = MetadataFilterIndex(self.metadatas)
+
+    @classmethod
+    def from_chroma(cls, db):
+        """Loads every embedding and its metadata from a langchain Chroma store"""
+        data = db.get(include=["embeddings", "metadatas", "documents"])
+        return cls(data["embeddings"], data["metadatas"], data["documents"])
+
+    @classmethod
+    def from_snapshot(cls, version=None):
+        """
+        Maps the CURRENT snapshot written by vector_store.py read-only (rows
+        already normalized, nothing copied), or None if there is none.
+        """
+        snapshot = load_snapshot(version)
+        if snapshot is None:
+            return None
+        version, matrix, metadatas, documents = snapshot
+        index = cls(matrix, metadatas, documents, normalized=True)
+        index.version = version
+        return index
+
+    def __len__(self):
+        return len(self.metadatas)
+
+    def search(self, query_vector, k, filters=None):
+        """
+        Returns (row indices, cosine scores) of the top-k rows, best first.
+        With filters, only the matching rows are scored at all.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        rows = self.filters.rows(filters)
+        scores = (self.matrix if rows is None else self.matrix[rows]) @ query
+        k = min(k, len(scores))
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return (top if rows is None else rows[top]), scores[top]
+
+    def search_many(self, query_vectors, k, filters=None):
+        """Batched search: one matrix-matrix product for all queries, rows best first"""
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+
+        rows = self.filters.rows(filters)
+        scores = queries @ (self.matrix if rows is None else self.matrix[rows]).T
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (len(queries), 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        return (top if rows is None else rows[top]), np.take_along_axis(top_scores, order, axis=1)
+
+    def similarity_search_by_vector(self, embedding, k=4, filters=None):
+        """Same contract as Chroma.similarity_search_by_vector"""
+        rows, _ = self.search(embedding, k, filters)
+        return [self._document(i) for i in rows]
+
+    def similarity_search_by_vectors(self, embeddings, k=4, filters=None):
+        """Batched similarity_search_by_vector; one document list per query"""
+        if len(embeddings) == 0:
+            return []
+        rows, _ = self.search_many(embeddings, k, filters)
+        return [[self._document(i) for i in query_rows] for query_rows in rows]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filters=None):
+        """[(Document, cosine similarity)], best first"""
+        rows, scores = self.search(embedding, k, filters)
+        return [(self._document(i), float(score)) for i, score in zip(rows, scores)]
+
+    def similarity_search_with_score_by_vectors(self, embeddings, k=4, filters=None):
+        """Batched similarity_search_with_score_by_vector; one list per query"""
+        if len(embeddings) == 0:
+            return []
+        rows, scores = self.search_many(embeddings, k, filters)
+        return [
+            [(self._document(i), float(score)) for i, score in zip(query_rows, query_scores)]
+            for query_rows, query_scores in zip(rows, scores)
+        ]
+
+    def document_by_url(self, url):
+        """The stored Document for a URL, or None"""
+        row = self._row_by_url(url)
+        return None if row is None else self._document(row)
+
+    def vectors_by_url(self, urls):
+        """Normalized embeddings for the given URLs (rows in order), or None if any URL is unknown"""
+        rows = [self._row_by_url(url) for url in urls]
+        if any(row is None for row in rows):
+            return None
+        return self.matrix[rows]
+
+    def _row_by_url(self, url):
+        if self._url_rows is None:
+            self._url_rows = {meta['url']: row for row, meta in enumerate(self.metadatas)}
+        return self._url_rows.get(url)
+
+    def _document(self, row):
+        return Document(page_content=str(self.documents[row]), metadata=self.metadatas[row])
+
+
+def check_parity(queries, k=15):
+    """Compares the top-k URLs of the NumPy index against Chroma for each query"""
+    from langchain_chroma import Chroma
+    from embedding_backends import get_embeddings
+
+    embeddings = get_embeddings()
+    db = Chroma(persist_directory=DB_DIR, embedding_function=embeddings)
+    index = NumpyIndex.from_chroma(db)
+
+    mismatches = 0
+    for query in queries:
+        vector = embeddings.embed_query(query)
+        chroma_urls = [d.metadata['url'] for d in db.similarity_search_by_vector(vector, k=k)]
+        numpy_urls = [d.metadata['url'] for d in index.similarity_search_by_vector(vector, k=k)]
+
+        if chroma_urls == numpy_urls:
+            print(f"MATCH    {query[:60]}")
+        else:
+            mismatches += 1
+            overlap = len(set(chroma_urls) & set(numpy_urls))
+            print(f"MISMATCH {query[:60]} (overlap {overlap}/{k})")
+
+    print(f"\n{len(queries) - mismatches}/{len(queries)} queries returned identical top-{k} lists.")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    sample_queries = [
+        "Need a Java developer who is good in collaborating with external teams and stakeholders.",
+        "Looking to hire mid-level professionals who are proficient in Python, SQL and Java Script.",
+        "I am hiring for an analyst and want to screen using Cognitive and personality tests",
+        "I need a sales manager who can drive revenue and manage a large team.",
+        "We need a customer service representative who remains calm under pressure.",
+        ".NET MVC",
+        "OPQ",
+    ]
+    # Non-zero exit on any mismatch, so the check can gate CI
+    sys.exit(0 if check_parity(sample_queries) else 1)
@@ -1,72 +1,173 @@
+import argparse
+import hashlib
 import json
 import os
 import shutil
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from lexical_index import LexicalIndex, LEXICAL_INDEX_FILE
+import embedding_backends
+from index_snapshot import (
+    current_snapshot_version, new_version, publish_snapshot, read_embedding_backend, read_index_version,
+    write_embedding_backend, write_index_version, write_snapshot
+)
 
 # --- CONFIGURATION ---
 DATA_FILE = "shl_assessments.json"
 DB_DIR = "chroma_db"
 
-def create_vector_db():
+def content_hash(item):
+    """Hash of everything that goes into the embedded text"""
+    content = "\x1f".join([item['name'], ", ".join(item['test_type']), item['description']])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def build_document(item):
+    page_content = f"""
+        Assessment Name: {item['name']}
+        Category: {', '.join(item['test_type'])}
+        Description: {item['description']}
+        """
+    
+    metadata = {
+        "name": item['name'],
+        "url": item['url'],
+        "duration": item['duration'],
+        "adaptive_support": item['adaptive_support'],
+        "remote_support": item['remote_support'],
+        "test_type": ", ".join(item['test_type']),
+        "content_hash": content_hash(item)
+    }
+    
+    return Document(page_content=page_content, metadata=metadata)
+
+def load_assessments():
     if not os.path.exists(DATA_FILE):
         print(f"Error: {DATA_FILE} not found.")
-        return
+        return None
 
     with open(DATA_FILE, "r", encoding="utf-8") as f:
         data = json.load(f)
 
     print(f"Loading {len(data)} assessments...")
+    return data
 
-    documents = []
-    for item in data:
-        page_content = f"""
-        Assessment Name: {item['name']}
-        Category: {', '.join(item['test_type'])}
-        Description: {item['description']}
-        """
-        
-        metadata = {
-            "name": item['name'],
-            "url": item['url'],
-            "duration": item['duration'],
-            "adaptive_support": item['adaptive_support'],
-            "remote_support": item['remote_support'],
-            "test_type": ", ".join(item['test_type'])
-        }
-        
-        doc = Document(page_content=page_content, metadata=metadata)
-        documents.append(doc)
-
-    print("Initializing AI Model (all-MiniLM-L6-v2)...")
-    # FORCE CPU
-    embeddings = HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2",
-        model_kwargs={'device': 'cpu'}
-    )
+def build_lexical_index(data):
+    """BM25 index over names + descriptions, stored next to the vectors (no model needed)"""
+    metadatas = [build_document(item).metadata for item in data]
+    LexicalIndex.build(data, metadatas).save(LEXICAL_INDEX_FILE)
+    print(f"Lexical index written to '{LEXICAL_INDEX_FILE}'.")
+
+def export_snapshot(db, version):
+    """Writes the memory-mapped serving snapshot for this version from the Chroma store and makes it CURRENT"""
+    data = db.get(include=["embeddings", "metadatas", "documents"])
+    write_snapshot(data["embeddings"], data["metadatas"], data["documents"], version)
+    publish_snapshot(version)
+
+def get_embeddings():
+    # Same backend config as rag_engine.py, so stored and query vectors are compatible
+    return embedding_backends.get_embeddings(embedding_backends.EMBEDDING_BACKEND)
+
+def create_vector_db():
+    """Full rebuild: deletes the store and re-embeds the whole catalog"""
+    data = load_assessments()
+    if data is None:
+        return
+
+    documents = [build_document(item) for item in data]
+    embeddings = get_embeddings()
 
     if os.path.exists(DB_DIR):
         shutil.rmtree(DB_DIR)
 
     print("Creating Vector Database...")
+    # Documents are keyed by URL so later syncs can update them in place
     vector_db = Chroma.from_documents(
         documents=documents,
         embedding=embeddings,
+        ids=[doc.metadata['url'] for doc in documents],
         persist_directory=DB_DIR
     )
+    build_lexical_index(data)
+    version = new_version()
+    export_snapshot(vector_db, version)
+    write_embedding_backend(embedding_backends.EMBEDDING_BACKEND)
+    write_index_version(version)
     
     print(f"Success! Vector Database created at '{DB_DIR}' with {len(documents)} items.")
 
+def sync_vector_db():
+    """
+    Incremental update: only new or changed assessments are re-embedded and
+    upserted, removed ones are deleted. Work scales with the catalog diff and
+    the store stays online, so a running API can keep serving and then swap
+    to the new index version.
+    """
+    data = load_assessments()
+    if data is None:
+        return
+
+    # Read the current state without loading the model
+    db = Chroma(persist_directory=DB_DIR)
+    existing = db.get(include=["metadatas"])
+    stored = dict(zip(existing["ids"], existing["metadatas"]))
+
+    wanted = {item['url']: build_document(item) for item in data}
+
+    # Stores built before URL keys (random ids, no content hash) are migrated by replacing every entry
+    to_delete = [doc_id for doc_id, meta in stored.items()
+                 if doc_id not in wanted or not meta.get("content_hash")]
+    to_embed = []
+    to_update_meta = []
+    for url, doc in wanted.items():
+        meta = stored.get(url)
+        if meta is None or meta.get("content_hash") != doc.metadata["content_hash"]:
+            to_embed.append(doc)
+        elif meta != doc.metadata:
+            # Same text, different duration/flags: no need to re-embed
+            to_update_meta.append(doc)
+
+    print(f"Sync plan: {len(to_embed)} to embed, {len(to_update_meta)} metadata updates, {len(to_delete)} to delete, "
+          f"{len(wanted) - len(to_embed) - len(to_update_meta)} unchanged.")
+    if not (to_embed or to_update_meta or to_delete):
+        if not os.path.exists(LEXICAL_INDEX_FILE):
+            build_lexical_index(data)
+        if current_snapshot_version() is None:
+            export_snapshot(db, read_index_version() or new_version())
+        print("Vector Database already up to date.")
+        return
+
+    # New vectors must come from the model that produced the stored ones
+    stored_backend = read_embedding_backend()
+    if to_embed and stored_backend != embedding_backends.EMBEDDING_BACKEND:
+        raise ValueError(
+            f"Store was embedded with the '{stored_backend}' backend but EMBEDDING_BACKEND is "
+            f"'{embedding_backends.EMBEDDING_BACKEND}'. Run with --full to re-embed everything."
+        )
+
+    if to_delete:
+        db.delete(ids=to_delete)
+    if to_update_meta:
+        db._collection.update(
+            ids=[doc.metadata['url'] for doc in to_update_meta],
+            metadatas=[doc.metadata for doc in to_update_meta]
+        )
+    if to_embed:
+        db = Chroma(persist_directory=DB_DIR, embedding_function=get_embeddings())
+        # add_documents upserts, so changed documents are replaced in place
+        db.add_documents(to_embed, ids=[doc.metadata['url'] for doc in to_embed])
+    build_lexical_index(data)
+    version = new_version()
+    export_snapshot(db, version)
+
+    # Published last: running engines only swap once the store is consistent
+    write_index_version(version)
+    print(f"Success! Vector Database synced at '{DB_DIR}' (version {version}).")
+
 def test_retrieval():
     """Simple test to prove the brain works"""
     print("\n--- TEST SEARCH ---")
     
-    # FORCE CPU HERE TOO
-    embeddings = HuggingFaceEmbeddings(
-        model_name="all-MiniLM-L6-v2",
-        model_kwargs={'device': 'cpu'}
-    )
+    embeddings = get_embeddings()
     
     db = Chroma(persist_directory=DB_DIR, embedding_function=embeddings)
     
@@ -83,10 +184,14 @@ def test_retrieval():
         print(f"Score: Match found") # Chroma doesn't return score in simple search
 
 if __name__ == "__main__":
-    # If the DB folder already exists and has files, skip creation to save time
-    if not os.path.exists(DB_DIR):
+    parser = argparse.ArgumentParser(description="Build or update the assessment vector store")
+    parser.add_argument("--full", action="store_true", help="Delete the store and re-embed everything")
+    args = parser.parse_args()
+
+    # Default is an incremental sync; on an up-to-date store it embeds nothing
+    if args.full or not os.path.exists(DB_DIR):
         create_vector_db()
     else:
-        print("Database already exists. Skipping creation.")
+        sync_vector_db()
         
     test_retrieval()
\ No newline at end of file